@@ -1,7 +1,13 @@
 import os
+import queue
+import threading
 import time
+import itertools
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 from loguru import logger
 # from playsound import playsound
 import cv2
@@ -9,9 +15,16 @@ import numpy as np
 from pathlib import Path
 from pygame import mixer
 
+from ._direct_io import AlignedBufferPool, write_direct
 from .telegram_manager import TelegramManager
 from .face_detection import Face
 
+JPEG_PARAMS = [int(cv2.IMWRITE_JPEG_QUALITY), 85, int(cv2.IMWRITE_JPEG_OPTIMIZE), 1]
+
+# Global Telegram token bucket, kept under the Bot API's 30 messages/second limit
+TELEGRAM_RATE = 25.0  # tokens per second
+TELEGRAM_BURST = 25.0
+
 # The `@dataclass` decorator in Python is used to automatically generate special methods such as
 # `__init__`, `__repr__`, `__eq__`, and `__hash__` for a class. In this specific case, the
 # `AlertEvent` class is a data class that represents an alert event with the following attributes:
@@ -32,26 +45,54 @@ class AlertSystem:
         self.alert_sound = config['app']['alert_sound']
         self.screenshot_dir = Path(config['app']['screenshot_dir'])
         self.screenshot_dir.mkdir(parents=True, exist_ok=True)
-        self.alert_history: List[AlertEvent] = []
+        self._known_dirs: Set[Path] = set()
+        # Alerts are appended in timestamp order, so the newest are always at the right end
+        self.alert_history: deque = deque(maxlen=config['app'].get('max_history', 1000))
         self.alert_enabled = True
         self.screenshot_enabled = True
+        # Minimum seconds between alerts for the same face on the same camera
+        self.cooldown = config['app'].get('alert_cooldown', 30)
+        self._last_alert: Dict[Tuple[int, str], float] = {}
+        self._tg_tokens = TELEGRAM_BURST
+        self._tg_refilled = time.monotonic()
         self.telegram = None
+        # Screenshot encoding runs off the camera/processing thread
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="alert-io")
+        # Aligned buffers for page-cache bypassing writes; allocated on first use
+        self._buffer_pool = AlignedBufferPool()
+        # (weak reference to the last screenshot frame, future of its JPEG bytes), so several
+        # alerts raised on the same frame share one encoding
+        self._last_encoded: Optional[Tuple[weakref.ref, Future]] = None
         if config.get('telegram', {}).get('enabled', False):
             self.telegram = TelegramManager(
                 config['telegram']['bot_token'],
                 config['telegram']['chat_id'],
                 config['telegram']['rate_limit']
             )
-        mixer.init()  # Add this at the start of your application
+        # The mixer is started on the first alert; an idle mixer still burns CPU on some Linux setups
+        self._sound: Optional[mixer.Sound] = None
+        self._sound_exists = os.path.exists(self.alert_sound)
+        # Playback happens on its own thread so alerts never wait on the audio backend
+        self._sound_q: queue.Queue = queue.Queue(maxsize=1)
+        self._sound_thread = threading.Thread(target=self._sound_worker, daemon=True, name="AlertSound")
+        self._sound_thread.start()
 
         
-    def trigger_alert(self, camera_id: int, camera_name: str, face_name: str, face: Face, confidence: float, frame: np.ndarray) -> AlertEvent:
-        """Trigger an alert for a recognized face"""
+    def trigger_alert(self, camera_id: int, camera_name: str, face_name: str, face: Face, confidence: float, frame: np.ndarray) -> Optional[AlertEvent]:
+        """Trigger an alert for a recognized face
+
+        Returns None if the same face already alerted on this camera within the cooldown.
+        """
         timestamp = time.time()
+        key = (camera_id, face_name)
+        if timestamp - self._last_alert.get(key, 0.0) < self.cooldown:
+            return None
+        self._last_alert[key] = timestamp
         screenshot_path = None
+        screenshot_future = None
         
         if self.screenshot_enabled:
-            screenshot_path = self._capture_screenshot(frame, camera_id, face_name, timestamp)
+            screenshot_path, screenshot_future = self._capture_screenshot(frame, camera_id, face_name, timestamp)
          # Ensure the path is converted to string and is not None when empty
         
         event = AlertEvent(
@@ -70,7 +111,7 @@ class AlertSystem:
         if self.alert_enabled:
             self._play_alert_sound()
         
-        if self.telegram:
+        if self.telegram and self._take_telegram_token():
             message_lines = [
                 "🚨 Face detected!",
                 f"👤 Name: {face_name}"
@@ -89,53 +130,118 @@ class AlertSystem:
 
             message = "\n".join(message_lines)
             
-            self.telegram.send_alert(
-                message=message,
-                image_path=screenshot_path
-            )
+            if screenshot_future is not None:
+                # Only send once the screenshot has been encoded, reusing the encoded bytes;
+                # the path is passed only if the file was actually written
+                def send(f: Future):
+                    data, written = (None, False) if f.cancelled() else f.result()
+                    self.telegram.send_alert(
+                        message=message,
+                        image_path=screenshot_path if written else None,
+                        image_bytes=data
+                    )
+                screenshot_future.add_done_callback(send)
+            else:
+                self.telegram.send_alert(message=message, image_path=None)
             
         logger.info(f"Alert triggered: {face_name} detected on {camera_name} with confidence {confidence:.2f}")
         return event
         
+    def _take_telegram_token(self) -> bool:
+        """Take a token from the global Telegram bucket, returning False if it is empty"""
+        now = time.monotonic()
+        self._tg_tokens = min(TELEGRAM_BURST, self._tg_tokens + (now - self._tg_refilled) * TELEGRAM_RATE)
+        self._tg_refilled = now
+        if self._tg_tokens < 1.0:
+            logger.warning("Telegram alert dropped: send rate exceeded")
+            return False
+        self._tg_tokens -= 1.0
+        return True
+
     def _play_alert_sound(self) -> None:
+        """Request the alert sound; a request already pending is enough, so extras are dropped"""
+        if not self._sound_exists:
+            return
+        try:
+            self._sound_q.put_nowait(True)
+        except queue.Full:
+            pass
+
+    def _sound_worker(self) -> None:
         """
-        The function `_play_alert_sound` attempts to play an alert sound file using the `mixer.music`
-        module in Python, logging an error if there is an exception.
+        Thread that plays the alert sound on request, initialising the mixer and loading the
+        sound on first use. The decoded `mixer.Sound` is reused for every later alert.
         """
-        try:
-            if os.path.exists(self.alert_sound):
-                # playsound(self.alert_sound, block=False)
-                  mixer.music.load(self.alert_sound)
-                  mixer.music.play()
-        except Exception as e:
-            logger.error(f"Error playing alert sound: {e}")
+        while self._sound_q.get() is not None:
+            try:
+                if self._sound is None:
+                    if not mixer.get_init():
+                        mixer.init(frequency=44100, buffer=4096)
+                    self._sound = mixer.Sound(self.alert_sound)
+                self._sound.play()
+            except Exception as e:
+                logger.error(f"Error playing alert sound: {e}")
 
-    def _capture_screenshot(self, frame: np.ndarray, camera_id: int, face_name: str, timestamp: float) -> Optional[Path]:
-        """Capture and save a screenshot of the alert"""
+    def _capture_screenshot(self, frame: np.ndarray, camera_id: int, face_name: str, timestamp: float) -> Tuple[Optional[Path], Optional[Future]]:
+        """Queue a screenshot of the alert for writing and return its path right away"""
         try:
             timestamp_str = time.strftime("%Y%m%d_%H%M%S", time.localtime(timestamp))
             filename = f"{timestamp_str}_cam{camera_id}_{face_name}.jpg"
-            filepath = self.screenshot_dir / filename
+            # Bucket by day and hour (YYYYMMDD/HH) so no single directory grows without bound
+            subdir = self.screenshot_dir / timestamp_str[:8] / timestamp_str[9:11]
+            filepath = subdir / filename
             
             # Ensure directory exists
-            filepath.parent.mkdir(parents=True, exist_ok=True)
+            if subdir not in self._known_dirs:
+                subdir.mkdir(parents=True, exist_ok=True)
+                self._known_dirs.add(subdir)
             
-            # Save the image
-            success = cv2.imwrite(str(filepath), frame)
-            if not success:
-                logger.error(f"Failed to save screenshot to {filepath}")
-                return None
-                
-            logger.info(f"Screenshot saved: {filepath}")
-            return filepath
+            # Encode and save in the background; the frame is copied since the caller keeps drawing on it.
+            # Further alerts on the same frame (several known faces in one pass) reuse its encoding
+            if self._last_encoded is not None and self._last_encoded[0]() is frame:
+                encoded = self._last_encoded[1]
+            else:
+                encoded = self._io_pool.submit(self._encode_jpeg, frame.copy())
+                self._last_encoded = (weakref.ref(frame), encoded)
+            future = self._io_pool.submit(self._write_jpeg, encoded, str(filepath))
+            return filepath, future
             
         except Exception as e:
             logger.error(f"Error capturing screenshot: {e}")
+            return None, None
+
+    @staticmethod
+    def _encode_jpeg(frame: np.ndarray) -> Optional[bytes]:
+        """Encode a frame as JPEG (runs on the I/O pool)"""
+        success, buffer = cv2.imencode('.jpg', frame, JPEG_PARAMS)
+        if not success:
+            logger.error("Failed to encode screenshot")
             return None
+        return buffer.tobytes()
+
+    def _write_jpeg(self, encoded: Future, path: str) -> Tuple[Optional[bytes], bool]:
+        """
+        Write an encoded screenshot to disk once it is ready (runs on the I/O pool).
+        Returns its bytes, which are kept even if the write fails, and whether the file was written.
+        """
+        data = None
+        try:
+            # Submitted before this task, so it is already running or done
+            data = encoded.result()
+            if data is None:
+                return None, False
+                
+            write_direct(path, data, self._buffer_pool)
+            logger.info(f"Screenshot saved: {path}")
+            return data, True
+            
+        except Exception as e:
+            logger.error(f"Error writing screenshot: {e}")
+            return data, False
 
     def get_recent_alerts(self, limit: int = 10) -> List[AlertEvent]:
         """Get most recent alerts"""
-        return sorted(self.alert_history, key=lambda x: x.timestamp, reverse=True)[:limit]
+        return list(itertools.islice(reversed(self.alert_history), limit))
 
     def clear_alerts(self) -> None:
         """Clear alert history"""
@@ -153,5 +259,11 @@ class AlertSystem:
     
     def shutdown(self):
         """Cleanup alert system resources"""
+        # Let queued screenshots (and their Telegram sends) finish first
+        self._io_pool.shutdown(wait=True)
+        try:
+            self._sound_q.put(None, timeout=1.0)
+        except queue.Full:
+            pass
         if hasattr(self, 'telegram') and self.telegram:
             self.telegram.shutdown()
\ No newline at end of file
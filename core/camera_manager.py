@@ -1,6 +1,12 @@
+import os
+import sys
+
+# Low-latency RTSP: TCP transport and no demuxer buffering. Must be set before any capture is opened.
+os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", "rtsp_transport;tcp|fflags;nobuffer")
+
 import cv2
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 from dataclasses import dataclass
 from loguru import logger
 import time
@@ -9,8 +15,21 @@ import queue
 import yaml
 from pathlib import Path
 
-@dataclass
+# cv2.rotate codes for the supported `rotate` settings (degrees clockwise)
+ROTATE_CODES = {
+    90: cv2.ROTATE_90_CLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+# Reader group shared by local V4L2 devices, see CameraManager._group_key
+LOCAL_GROUP = 'local'
+
+@dataclass(frozen=True)
 class CameraConfig:
+    # Declared by hand since dataclass(slots=True) needs Python 3.10
+    __slots__ = ('id', 'name', 'source', 'enabled', 'width', 'height', 'fps', 'rotate')
+    
     id: int
     name: str
     source: str
@@ -20,49 +39,40 @@ class CameraConfig:
     fps: int
     rotate: int
 
+class _ReaderGroup:
+    """Captures serviced by one reader thread, and that thread's open/close requests"""
+
+    def __init__(self):
+        self.thread: Optional[threading.Thread] = None
+        self.stop = threading.Event()
+        # ('open' | 'close', cam_id) requests for the reader thread, which owns the group's captures
+        self.commands: queue.Queue = queue.Queue()
+        self.caps: Dict[int, cv2.VideoCapture] = {}
+        # cam_id -> monotonic time before which a failed camera is not read again
+        self.retry_at: Dict[int, float] = {}
+
 class CameraManager:
     def __init__(self, config_path: str):
         self.cameras: Dict[int, CameraConfig] = {}
-        self.capture_threads: Dict[int, threading.Thread] = {}
-        self.stop_event = threading.Event()
-        self.frame_queues: Dict[int, queue.Queue] = {}
+        # Cameras that have been started; each is serviced by the reader thread of its group
+        self.active_cameras: Set[int] = set()
+        # Group key (see _group_key) -> reader group
+        self._groups: Dict[str, _ReaderGroup] = {}
+        # Latest unconsumed frame per camera; one condition guards the whole slot table
+        self._cv = threading.Condition()
+        self._slot: Dict[int, np.ndarray] = {}
         self.load_config(config_path)
 
-    def _cleanup_camera_thread(self, cam_id: int):
-        """Clean up camera thread resources"""
-        if cam_id in self.capture_threads:
-            # Signal thread to stop
-            self.stop_event.set()
-            
-            # Wait for thread to finish
-            thread = self.capture_threads.pop(cam_id)
-            thread.join(timeout=2.0)
-            
-            if thread.is_alive():
-                logger.warning(f"Camera ID {cam_id} thread did not stop gracefully")
-            
-            # Clean up queue
-            if cam_id in self.frame_queues:
-                try:
-                    while True:
-                        self.frame_queues[cam_id].get_nowait()
-                except queue.Empty:
-                    pass
-                del self.frame_queues[cam_id]
-                
-            logger.debug(f"Cleaned up resources for camera ID {cam_id}")
-
-        
     def load_config(self, config_path: str) -> None:
         """Load camera configuration from YAML file"""
         try:
             with open(config_path, 'r') as f:
                 config = yaml.safe_load(f)
                 
-            self.cameras.clear()
+            cameras: Dict[int, CameraConfig] = {}
             for cam_config in config.get('cameras', []):
                 cam_id = cam_config['id']
-                self.cameras[cam_id] = CameraConfig(
+                cameras[cam_id] = CameraConfig(
                     id=cam_id,
                     name=cam_config.get('name', f'Camera {cam_id}'),
                     source=cam_config['source'],
@@ -73,6 +83,7 @@ class CameraManager:
                     rotate=cam_config.get('rotate', 0)
                 )
                 
+            self.cameras = cameras
             logger.info(f"Loaded {len(self.cameras)} camera configurations")
             
         except Exception as e:
@@ -81,126 +92,247 @@ class CameraManager:
 
     def start_all_cameras(self) -> None:
         """Start all enabled cameras"""
-        self.stop_event.clear()
         for cam_id, cam_config in self.cameras.items():
             if cam_config.enabled:
                 self.start_camera(cam_id)
                 
     def stop_all_cameras(self) -> None:
-        """Stop all camera threads"""
-        self.stop_event.set()
-        for thread in self.capture_threads.values():
-            thread.join(timeout=2)
-        self.capture_threads.clear()
-        self.frame_queues.clear()
+        """Stop every reader thread and release every camera"""
+        for group in self._groups.values():
+            group.stop.set()
+        for key, group in list(self._groups.items()):
+            group.thread.join(timeout=2)
+            if group.thread.is_alive():
+                # Kept so no new reader is started for these cameras until this one has exited
+                logger.warning(f"Camera reader thread {group.thread.name} did not stop gracefully")
+            else:
+                del self._groups[key]
+            # Discard requests the reader never got to
+            try:
+                while True:
+                    group.commands.get_nowait()
+            except queue.Empty:
+                pass
+        self.active_cameras.clear()
+        with self._cv:
+            self._slot.clear()
         logger.info("All camera threads stopped")
 
     def start_camera(self, cam_id: int) -> bool:
-            """Start a single camera"""
-            if cam_id not in self.cameras:
-                logger.error(f"Camera ID {cam_id} not found in configuration")
-                return False
-                
-            if not self.cameras[cam_id].enabled:
-                logger.warning(f"Camera ID {cam_id} is disabled in configuration")
-                return False
-                
-            # Clean up any existing thread first
-            if cam_id in self.capture_threads:
-                self._cleanup_camera_thread(cam_id)
-                
-            # Create new queue and thread
-            self.frame_queues[cam_id] = queue.Queue(maxsize=1)
-            self.stop_event.clear()  # Clear the stop event
+        """Start a single camera (restarting it if it is already running)"""
+        if cam_id not in self.cameras:
+            logger.error(f"Camera ID {cam_id} not found in configuration")
+            return False
             
-            self.capture_threads[cam_id] = threading.Thread(
-                target=self._capture_frames,
-                args=(cam_id,),
-                daemon=True,
-                name=f"CameraThread-{cam_id}"
-            )
-            self.capture_threads[cam_id].start()
-            logger.info(f"Started camera ID {cam_id}")
-            return True
+        if not self.cameras[cam_id].enabled:
+            logger.warning(f"Camera ID {cam_id} is disabled in configuration")
+            return False
+            
+        group = self._ensure_reader(cam_id)
+        if group is None:
+            logger.error(f"Camera ID {cam_id} not started: its previous reader thread has not exited")
+            return False
+            
+        self.active_cameras.add(cam_id)
+        group.commands.put(('open', cam_id))
+        logger.info(f"Started camera ID {cam_id}")
+        return True
     
     def stop_camera(self, cam_id: int) -> bool:
         """Stop a single camera"""
-        if cam_id in self.capture_threads:
-            self._cleanup_camera_thread(cam_id)
-            logger.info(f"Stopped camera ID {cam_id}")
-            return True
-        return False
-
-    def _capture_frames(self, cam_id: int) -> None:
-        """Thread function to capture frames from a camera"""
+        if cam_id not in self.active_cameras:
+            return False
+        self.active_cameras.discard(cam_id)
+        group = self._groups.get(self._group_key(cam_id))
+        if group is not None:
+            group.commands.put(('close', cam_id))
+        # Drop any unconsumed frame
+        with self._cv:
+            self._slot.pop(cam_id, None)
+        logger.info(f"Stopped camera ID {cam_id}")
+        return True
+
+    def _group_key(self, cam_id: int) -> str:
+        """
+        Reader group of a camera. Local devices on Linux (V4L2) share one reader that waits on all
+        of them at once; every other source, e.g. RTSP whose grab can block for seconds while it
+        reconnects, gets a reader of its own so it cannot stall the other cameras.
+        """
+        if str(self.cameras[cam_id].source).isdigit() and sys.platform.startswith('linux'):
+            return LOCAL_GROUP
+        return f"cam{cam_id}"
+
+    def _ensure_reader(self, cam_id: int) -> Optional[_ReaderGroup]:
+        """Return the running reader group for a camera, starting it if needed; None if the old one is still stopping"""
+        key = self._group_key(cam_id)
+        group = self._groups.get(key)
+        if group is not None and group.stop.is_set():
+            # Stopped by stop_all_cameras but not yet exited; it still owns its captures
+            group.thread.join(timeout=2)
+            if group.thread.is_alive():
+                return None
+            group = None
+        if group is None:
+            group = _ReaderGroup()
+            group.thread = threading.Thread(
+                target=self._reader_loop,
+                args=(group,),
+                daemon=True,
+                name=f"CameraReader-{key}"
+            )
+            self._groups[key] = group
+            group.thread.start()
+        return group
+
+    def _open_capture(self, cam_id: int) -> Optional[cv2.VideoCapture]:
+        """Open and configure the capture for a camera"""
         cam_config = self.cameras[cam_id]
-        cap = None
         
-        try:
-            # Handle different source types
-            source = int(cam_config.source) if str(cam_config.source).isdigit() else cam_config.source
+        # Handle different source types
+        source = int(cam_config.source) if str(cam_config.source).isdigit() else cam_config.source
+        if isinstance(source, str) and source.lower().startswith('rtsp://'):
+            cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+        else:
             cap = cv2.VideoCapture(source)
+        
+        if not cap.isOpened():
+            logger.error(f"Failed to open camera ID {cam_id} with source {cam_config.source}")
+            cap.release()
+            return None
             
-            if not cap.isOpened():
-                logger.error(f"Failed to open camera ID {cam_id} with source {cam_config.source}")
-                return
-                
-            # Set camera properties
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, cam_config.width)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, cam_config.height)
-            cap.set(cv2.CAP_PROP_FPS, cam_config.fps)
-            
-            logger.info(f"Camera ID {cam_id} opened successfully")
-            
-            while not self.stop_event.is_set():
-                ret, frame = cap.read()
-                if not ret:
-                    logger.warning(f"Camera ID {cam_id} read failed")
-                    time.sleep(1)
-                    continue
-                    
-                # Apply rotation if needed
-                if cam_config.rotate == 90:
-                    frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-                elif cam_config.rotate == 180:
-                    frame = cv2.rotate(frame, cv2.ROTATE_180)
-                elif cam_config.rotate == 270:
-                    frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
-                
-                # Put frame in queue
-                if self.frame_queues[cam_id].full():
+        # Ask local devices for compressed MJPG instead of raw YUYV (far less USB bandwidth)
+        if isinstance(source, int):
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        # Keep only the newest frame in the driver buffer to avoid reading stale frames
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        
+        # Set camera properties
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, cam_config.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, cam_config.height)
+        cap.set(cv2.CAP_PROP_FPS, cam_config.fps)
+        
+        logger.info(f"Camera ID {cam_id} opened successfully")
+        return cap
+
+    @staticmethod
+    def _close_capture(group: _ReaderGroup, cam_id: int) -> None:
+        cap = group.caps.pop(cam_id, None)
+        if cap is not None:
+            cap.release()
+            logger.info(f"Camera ID {cam_id} released")
+
+    def _process_commands(self, group: _ReaderGroup, timeout: Optional[float] = None) -> None:
+        """Apply a group's pending open/close requests, optionally waiting for the first one"""
+        try:
+            command = group.commands.get(timeout=timeout) if timeout else group.commands.get_nowait()
+            while True:
+                action, cam_id = command
+                self._close_capture(group, cam_id)
+                if action == 'open' and cam_id in self.active_cameras:
                     try:
-                        self.frame_queues[cam_id].get_nowait()
-                    except queue.Empty:
-                        pass
-                        
-                self.frame_queues[cam_id].put(frame)
-                
-        except Exception as e:
-            logger.error(f"Error in camera ID {cam_id} capture thread: {e}")
+                        cap = self._open_capture(cam_id)
+                    except Exception as e:
+                        logger.error(f"Error opening camera ID {cam_id}: {e}")
+                        cap = None
+                    if cap is not None:
+                        group.caps[cam_id] = cap
+                command = group.commands.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _grab_ready(self, caps: List[Tuple[int, cv2.VideoCapture]]) -> Tuple[List[int], List[int]]:
+        """Grab a frame from every camera that has one, returning (ready, failed) camera ids"""
+        if all(cap.getBackendName() == 'V4L2' for _, cap in caps):
+            # Local devices: block on all device descriptors at once
+            try:
+                _, ready = cv2.VideoCapture.waitAny([cap for _, cap in caps], 100_000_000)
+                return [caps[i][0] for i in (ready if ready is not None else [])], []
+            except cv2.error as e:
+                logger.debug(f"waitAny failed, falling back to sequential grabs: {e}")
+        
+        ready, failed = [], []
+        for cam_id, cap in caps:
+            (ready if cap.grab() else failed).append(cam_id)
+        return ready, failed
+
+    def _reader_loop(self, group: _ReaderGroup) -> None:
+        """Thread function that captures frames from the cameras of one reader group"""
+        try:
+            while not group.stop.is_set():
+                try:
+                    self._read_once(group)
+                except Exception as e:
+                    logger.error(f"Error in camera reader thread: {e}")
+                    time.sleep(1)
         finally:
-            if cap is not None:
-                cap.release()
-            logger.info(f"Camera ID {cam_id} capture thread exiting")
+            for cam_id in list(group.caps):
+                self._close_capture(group, cam_id)
+            logger.info("Camera reader thread exiting")
+
+    def _read_once(self, group: _ReaderGroup) -> None:
+        """One pass of the reader loop: apply requests, then grab from every ready camera"""
+        self._process_commands(group, timeout=None if group.caps else 0.1)
+        
+        now = time.monotonic()
+        retry_at = group.retry_at
+        caps = [(cam_id, cap) for cam_id, cap in group.caps.items() if retry_at.get(cam_id, 0.0) <= now]
+        if not caps:
+            time.sleep(0.01)
+            return
+        
+        ready, failed = self._grab_ready(caps)
+        
+        for cam_id in failed:
+            logger.warning(f"Camera ID {cam_id} read failed")
+            retry_at[cam_id] = now + 1.0
+        
+        for cam_id in ready:
+            ret, frame = group.caps[cam_id].retrieve()
+            if not ret:
+                logger.warning(f"Camera ID {cam_id} read failed")
+                retry_at[cam_id] = now + 1.0
+                continue
+                
+            # Apply rotation if needed. Each frame gets its own output array: published frames are
+            # handed to consumers that may still be using them, so a shared buffer would be overwritten.
+            rotate_code = ROTATE_CODES.get(self.cameras[cam_id].rotate)
+            if rotate_code is not None:
+                frame = cv2.rotate(frame, rotate_code)
+            
+            # Publish as the latest frame, replacing any unconsumed one (unless the reader was stopped meanwhile)
+            with self._cv:
+                if group.stop.is_set():
+                    return
+                self._slot[cam_id] = frame
+                self._cv.notify_all()
 
 
+    @staticmethod
+    def _readonly(frame: np.ndarray) -> np.ndarray:
+        """Read-only view of a frame, so in-place edits by consumers fail loudly instead of aliasing"""
+        view = frame.view()
+        view.flags.writeable = False
+        return view
+
     def get_frame(self, cam_id: int) -> Optional[np.ndarray]:
-        """Get the latest frame from a camera"""
-        if cam_id not in self.frame_queues:
-            return None
-            
-        try:
-            return self.frame_queues[cam_id].get_nowait()
-        except queue.Empty:
-            return None
+        """Get the latest frame from a camera as a read-only view (each frame is returned only once)"""
+        with self._cv:
+            frame = self._slot.pop(cam_id, None)
+        return self._readonly(frame) if frame is not None else None
 
     def get_all_frames(self) -> Dict[int, np.ndarray]:
-        """Get latest frames from all cameras"""
-        frames = {}
-        for cam_id in self.frame_queues:
-            frame = self.get_frame(cam_id)
-            if frame is not None:
-                frames[cam_id] = frame
+        """Get latest frames from all cameras as read-only views"""
+        with self._cv:
+            frames = {cam_id: self._readonly(frame) for cam_id, frame in self._slot.items()}
+            self._slot.clear()
+        return frames
+
+    def wait_for_frames(self, timeout: float) -> Dict[int, np.ndarray]:
+        """Like get_all_frames, but first wait up to timeout seconds for any camera to publish a frame"""
+        with self._cv:
+            self._cv.wait_for(lambda: self._slot, timeout)
+            frames = {cam_id: self._readonly(frame) for cam_id, frame in self._slot.items()}
+            self._slot.clear()
         return frames
 
     def get_camera_status(self, cam_id: int) -> Dict:
@@ -211,8 +343,8 @@ class CameraManager:
         status = {
             'id': cam_id,
             'name': self.cameras[cam_id].name,
-            'running': cam_id in self.capture_threads,
-            'frame_queue_size': self.frame_queues.get(cam_id, queue.Queue()).qsize(),
+            'running': cam_id in self.active_cameras,
+            'frame_queue_size': int(cam_id in self._slot),
             'enabled': self.cameras[cam_id].enabled
         }
         return status
@@ -1,10 +1,100 @@
 import sqlite3
+import functools
+import itertools
+from collections import deque
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from pathlib import Path
 from loguru import logger
+import numpy as np
+import threading
 import time
 
+# Pending face events are written in batches by a background thread, which sleeps while nothing is queued
+FLUSH_INTERVAL = 0.1  # seconds to let a batch gather after the first event arrives
+FLUSH_THRESHOLD = 64  # wake the flusher early once this many events are queued
+FLUSH_BATCH_SIZE = 256
+
+MMAP_SIZE = 256 * 1024 * 1024  # let SQLite read pages straight from a memory map
+CACHED_STATEMENTS = 256
+
+# Statements are kept as constants so every call hands SQLite the same string and hits its statement cache
+_INSERT_LOG = '''
+    INSERT INTO face_logs (
+        id, timestamp, camera_id, camera_name, face_name,
+        age, gender, confidence, screenshot_path
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+_SELECT_LOGS_BASE = '''
+    SELECT id, timestamp, camera_id, camera_name, face_name, age, gender, confidence, screenshot_path
+    FROM face_logs
+'''
+# Just what a history list row shows; the rest is fetched by id when a row is selected.
+# The cast turns timestamps stored as text or bytes by older versions into floats
+_SELECT_LOG_SUMMARIES_BASE = '''
+    SELECT id, CAST(timestamp AS REAL), face_name, camera_name
+    FROM face_logs
+'''
+_SELECT_LOG_BY_ID = _SELECT_LOGS_BASE + " WHERE id = ?"
+_INSERT_KNOWN_FACE = '''
+    INSERT INTO known_faces (name, embedding, image_path, created_at)
+    VALUES (?, ?, ?, ?)
+'''
+_SELECT_KNOWN_FACES = "SELECT name, embedding, image_path FROM known_faces"
+_DELETE_KNOWN_FACE = "DELETE FROM known_faces WHERE name = ?"
+
+# Version 1: known_faces embeddings are raw float32 bytes
+# Version 2: embeddings are L2-normalised and quantised, prefixed with a one-byte format tag
+SCHEMA_VERSION = 2
+
+TAG_FP16 = b'H'  # float16 values
+TAG_INT8 = b'Q'  # float32 scale followed by symmetric int8 values
+EMBEDDING_TAGS = {'float16': TAG_FP16, 'int8': TAG_INT8}
+
+def _quantize(embedding: np.ndarray, tag: bytes = TAG_FP16) -> bytes:
+    """L2-normalise an embedding and encode it as a tagged float16 or int8 blob"""
+    if isinstance(embedding, (bytes, bytearray, memoryview)):
+        embedding = np.frombuffer(embedding, dtype=np.float32)
+    embedding = np.asarray(embedding, dtype=np.float32).ravel()
+    norm = np.linalg.norm(embedding)
+    if norm > 0:
+        embedding = embedding / norm
+    if tag == TAG_FP16:
+        return tag + embedding.astype(np.float16).tobytes()
+    if tag == TAG_INT8:
+        scale = float(np.abs(embedding).max()) / 127 or 1.0
+        q = np.clip(np.rint(embedding / scale), -127, 127).astype(np.int8)
+        return tag + np.float32(scale).tobytes() + q.tobytes()
+    raise ValueError(f"Unknown embedding tag {tag!r}")
+
+def _dequantize(blob: bytes) -> np.ndarray:
+    """Decode a tagged embedding blob into a float16 vector"""
+    tag, payload = blob[:1], blob[1:]
+    if tag == TAG_FP16:
+        return np.frombuffer(payload, dtype=np.float16)
+    if tag == TAG_INT8:
+        scale = np.frombuffer(payload[:4], dtype=np.float32)[0]
+        return (np.frombuffer(payload[4:], dtype=np.int8) * scale).astype(np.float16)
+    raise ValueError(f"Unknown embedding tag {tag!r}")
+
+@functools.lru_cache(maxsize=None)
+def _select_logs_query(base: str, by_camera: bool, by_face: bool, by_start: bool, by_end: bool) -> str:
+    """Build a face_logs query for a combination of filters, once per combination"""
+    conditions = []
+    if by_camera:
+        conditions.append("camera_id = ?")
+    if by_face:
+        conditions.append("face_name = ?")
+    if by_start:
+        conditions.append("timestamp >= ?")
+    if by_end:
+        conditions.append("timestamp <= ?")
+    query = base
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query + " ORDER BY timestamp DESC LIMIT ?"
+
 @dataclass
 class FaceLogEntry:
     id: int
@@ -25,18 +115,48 @@ class FaceLogEntry:
             self.timestamp = float(self.timestamp)
 
 class FaceDatabase:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, embedding_dtype: str = 'float16'):
         self.db_path = Path(db_path)
+        if embedding_dtype not in EMBEDDING_TAGS:
+            raise ValueError(f"Unsupported embedding dtype: {embedding_dtype}")
+        self._embedding_tag = EMBEDDING_TAGS[embedding_dtype]
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # Separate read-only connection for queries, so reads never queue behind writes
+        self._ro: Optional[sqlite3.Connection] = None
+        self._ro_lock = threading.Lock()
+        self._pending = deque()
+        self._flush_event = threading.Event()
+        self._stop_event = threading.Event()
         self._init_db()
+        
+        self._flush_thread = threading.Thread(
+            target=self._flusher,
+            daemon=True,
+            name="FaceDatabaseFlusher"
+        )
+        self._flush_thread.start()
 
     def _init_db(self) -> None:
         """Initialize the database with required tables"""
         try:
             self.db_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
+            # One connection for the lifetime of the database; access is serialised by self._lock
+            self._conn = sqlite3.connect(
+                self.db_path,
+                cached_statements=CACHED_STATEMENTS,
+                check_same_thread=False,
+                isolation_level=None
+            )
+            self._conn.set_trace_callback(None)
+            
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            
+            with self._transaction() as cursor:
                 # Create face_logs table
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS face_logs (
@@ -63,40 +183,129 @@ class FaceDatabase:
                     )
                 ''')
                 
-                conn.commit()
-                logger.success("Database initialized successfully")
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS meta (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL
+                    )
+                ''')
+                self._migrate(cursor)
+                
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_logs_ts ON face_logs(timestamp DESC)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_logs_cam ON face_logs(camera_id, timestamp)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_logs_face ON face_logs(face_name, timestamp)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_logs_cam_face ON face_logs(camera_id, face_name, timestamp)
+                ''')
+                
+                # Event ids are assigned client-side so logging never waits on the database
+                cursor.execute("SELECT COALESCE(MAX(id), 0) FROM face_logs")
+                self._next_log_id = itertools.count(cursor.fetchone()[0] + 1)
+                
+            self._ro = sqlite3.connect(
+                f"{self.db_path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                cached_statements=CACHED_STATEMENTS,
+                check_same_thread=False
+            )
+            self._ro.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            
+            logger.success("Database initialized successfully")
                 
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
             raise
 
+    def _migrate(self, cursor: sqlite3.Cursor) -> None:
+        """Bring an older database up to SCHEMA_VERSION"""
+        cursor.execute("SELECT value FROM meta WHERE key = 'schema_version'")
+        row = cursor.fetchone()
+        version = int(row[0]) if row else 1
+        
+        if version < 2:
+            # Older rows carry no format marker, so convert them all once
+            cursor.execute("SELECT id, embedding FROM known_faces")
+            rows = cursor.fetchall()
+            updates = []
+            for face_id, blob in rows:
+                embedding = np.frombuffer(blob, dtype=np.float32)
+                updates.append((_quantize(embedding, self._embedding_tag), face_id))
+            cursor.executemany("UPDATE known_faces SET embedding = ? WHERE id = ?", updates)
+            if rows:
+                logger.info(f"Quantised {len(rows)} stored face embeddings")
+            
+        cursor.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+            (str(SCHEMA_VERSION),)
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Run a write transaction on the shared connection"""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN")
+            try:
+                yield cursor
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+
     def log_face_event(self, event) -> int:
-        """Log a face recognition event to the database"""
+        """Queue a face recognition event for logging and return its id"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO face_logs (
-                        timestamp, camera_id, camera_name, face_name,
-                        age, gender, confidence, screenshot_path
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    float(event.timestamp),
-                    int(event.camera_id),
-                    str(event.camera_name),
-                    str(event.face_name),
-                    int(event.age) if event.age else None,
-                    str(event.gender) if event.gender else None,
-                    float(event.confidence),
-                    str(event.screenshot_path) if event.screenshot_path else None
-                ))
-                conn.commit()
-                return cursor.lastrowid
+            log_id = next(self._next_log_id)
+            self._pending.append((
+                log_id,
+                float(event.timestamp),
+                int(event.camera_id),
+                str(event.camera_name),
+                str(event.face_name),
+                int(event.age) if event.age else None,
+                str(event.gender) if event.gender else None,
+                float(event.confidence),
+                str(event.screenshot_path) if event.screenshot_path else None
+            ))
+            # Wake the flusher for the first event of a batch, and again once the batch is large
+            pending = len(self._pending)
+            if pending == 1 or pending >= FLUSH_THRESHOLD:
+                self._flush_event.set()
+            return log_id
                 
         except Exception as e:
             logger.error(f"Error logging face event: {e}")
             raise
 
+    def _flusher(self) -> None:
+        """Background thread that writes queued face events in batches"""
+        while not self._stop_event.is_set():
+            self._flush_event.wait()
+            self._flush_event.clear()
+            if not self._stop_event.is_set() and len(self._pending) < FLUSH_THRESHOLD:
+                # Let more events join this batch, unless it fills up first
+                self._flush_event.wait(FLUSH_INTERVAL)
+                self._flush_event.clear()
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write all queued face events, one transaction per batch"""
+        while self._pending:
+            rows = []
+            while self._pending and len(rows) < FLUSH_BATCH_SIZE:
+                rows.append(self._pending.popleft())
+            try:
+                with self._transaction() as cursor:
+                    cursor.executemany(_INSERT_LOG, rows)
+            except Exception as e:
+                logger.error(f"Error writing {len(rows)} face events: {e}")
+
     def get_face_logs(self, limit: int = 100, 
                  camera_id: Optional[int] = None,
                  face_name: Optional[str] = None,
@@ -104,76 +313,112 @@ class FaceDatabase:
                  end_time: Optional[float] = None) -> List[FaceLogEntry]:
         """Retrieve face logs with optional filters"""
         try:
-            query = '''
-                SELECT id, timestamp, camera_id, camera_name, face_name, age, gender, confidence, screenshot_path
-                FROM face_logs
-            '''
-            params = []
-            conditions = []
+            # Make sure recently queued events are visible
+            self._flush()
             
-            if camera_id is not None:
-                conditions.append("camera_id = ?")
-                params.append(camera_id)
-                
-            if face_name is not None:
-                conditions.append("face_name = ?")
-                params.append(face_name)
-                
-            if start_time is not None:
-                conditions.append("timestamp >= ?")
-                params.append(float(start_time))
-                
-            if end_time is not None:
-                conditions.append("timestamp <= ?")
-                params.append(float(end_time))
-                
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-                
-            query += " ORDER BY timestamp DESC LIMIT ?"
-            params.append(limit)
+            query, params = self._logs_query(_SELECT_LOGS_BASE, limit, camera_id, face_name, start_time, end_time)
             
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
+            entries = []
+            with self._ro_lock:
+                cursor = self._ro.cursor()
+                cursor.arraysize = 256
                 cursor.execute(query, params)
                 
-                entries = []
-                for row in cursor.fetchall():
-                    try:
-                        # Convert all values to proper types
-                        entries.append(FaceLogEntry(
-                            id=row['id'],
-                            timestamp=float(row['timestamp']),
-                            camera_id=row['camera_id'],
-                            camera_name=row['camera_name'],
-                            face_name=row['face_name'],
-                            age=row['age'],
-                            gender=row['gender'],
-                            confidence=float(row['confidence']),
-                            screenshot_path=row['screenshot_path']
-                        ))
-                    except Exception as e:
-                        logger.error(f"Error converting row {dict(row)}: {e}")
-                        continue
-                        
-                return entries
+                rows = cursor.fetchmany()
+                while rows:
+                    for row in rows:
+                        try:
+                            # Columns by position: id, timestamp, camera_id, camera_name, face_name,
+                            # age, gender, confidence, screenshot_path
+                            entries.append(self._log_entry(row))
+                        except Exception as e:
+                            logger.error(f"Error converting row {row}: {e}")
+                            continue
+                    rows = cursor.fetchmany()
+                    
+            return entries
                 
         except Exception as e:
             logger.error(f"Error retrieving face logs: {e}")
             return []
 
-    def add_known_face(self, name: str, embedding: bytes, image_path: str) -> bool:
+    def get_face_logs_summary(self, limit: int = 100,
+                 camera_id: Optional[int] = None,
+                 face_name: Optional[str] = None,
+                 start_time: Optional[float] = None,
+                 end_time: Optional[float] = None) -> List[Tuple[int, float, str, str]]:
+        """Retrieve (id, timestamp, face_name, camera_name) for face logs matching the filters, timestamp as a float"""
+        try:
+            self._flush()
+            query, params = self._logs_query(_SELECT_LOG_SUMMARIES_BASE, limit, camera_id, face_name, start_time, end_time)
+            with self._ro_lock:
+                return self._ro.execute(query, params).fetchall()
+        except Exception as e:
+            logger.error(f"Error retrieving face log summaries: {e}")
+            return []
+
+    def get_face_log(self, log_id: int) -> Optional[FaceLogEntry]:
+        """Retrieve a single face log by id"""
+        try:
+            with self._ro_lock:
+                row = self._ro.execute(_SELECT_LOG_BY_ID, (log_id,)).fetchone()
+            return self._log_entry(row) if row is not None else None
+        except Exception as e:
+            logger.error(f"Error retrieving face log {log_id}: {e}")
+            return None
+
+    @staticmethod
+    def _logs_query(base: str, limit: int,
+                 camera_id: Optional[int],
+                 face_name: Optional[str],
+                 start_time: Optional[float],
+                 end_time: Optional[float]) -> Tuple[str, list]:
+        """Query text and parameters for a face_logs select with optional filters"""
+        query = _select_logs_query(
+            base,
+            camera_id is not None,
+            face_name is not None,
+            start_time is not None,
+            end_time is not None
+        )
+        params = []
+        
+        if camera_id is not None:
+            params.append(camera_id)
+            
+        if face_name is not None:
+            params.append(face_name)
+            
+        if start_time is not None:
+            params.append(float(start_time))
+            
+        if end_time is not None:
+            params.append(float(end_time))
+            
+        params.append(limit)
+        return query, params
+
+    @staticmethod
+    def _log_entry(row: tuple) -> FaceLogEntry:
+        """Build a FaceLogEntry from a row selected with _SELECT_LOGS_BASE"""
+        return FaceLogEntry(
+            id=row[0],
+            timestamp=float(row[1]),
+            camera_id=row[2],
+            camera_name=row[3],
+            face_name=row[4],
+            age=row[5],
+            gender=row[6],
+            confidence=float(row[7]),
+            screenshot_path=row[8]
+        )
+
+    def add_known_face(self, name: str, embedding: np.ndarray, image_path: str) -> bool:
         """Add a known face to the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO known_faces (name, embedding, image_path, created_at)
-                    VALUES (?, ?, ?, ?)
-                ''', (name, embedding, image_path, time.time()))
-                conn.commit()
-                return True
+            with self._transaction() as cursor:
+                cursor.execute(_INSERT_KNOWN_FACE, (name, _quantize(embedding, self._embedding_tag), image_path, time.time()))
+            return True
         except sqlite3.IntegrityError:
             logger.warning(f"Face with name '{name}' already exists")
             return False
@@ -184,16 +429,14 @@ class FaceDatabase:
     def get_known_faces(self) -> List[dict]:
         """Retrieve all known faces from the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT name, embedding, image_path FROM known_faces
-                ''')
-                return [{
-                    'name': row[0],
-                    'embedding': row[1],
-                    'image_path': row[2]
-                } for row in cursor.fetchall()]
+            with self._ro_lock:
+                cursor = self._ro.execute(_SELECT_KNOWN_FACES)
+                rows = cursor.fetchall()
+            return [{
+                'name': row[0],
+                'embedding': _dequantize(row[1]),
+                'image_path': row[2]
+            } for row in rows]
         except Exception as e:
             logger.error(f"Error retrieving known faces: {e}")
             return []
@@ -201,13 +444,29 @@ class FaceDatabase:
     def delete_known_face(self, name: str) -> bool:
         """Delete a known face from the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    DELETE FROM known_faces WHERE name = ?
-                ''', (name,))
-                conn.commit()
-                return cursor.rowcount > 0
+            with self._transaction() as cursor:
+                cursor.execute(_DELETE_KNOWN_FACE, (name,))
+                deleted = cursor.rowcount
+            return deleted > 0
         except Exception as e:
             logger.error(f"Error deleting known face: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def close(self) -> None:
+        """Close the database connections"""
+        with self._ro_lock:
+            if self._ro is not None:
+                self._ro.close()
+                self._ro = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def shutdown(self) -> None:
+        """Cleanup database resources"""
+        self._stop_event.set()
+        self._flush_event.set()
+        self._flush_thread.join(timeout=2.0)
+        self._flush()
+        self.close()
@@ -1,25 +1,120 @@
 import os
+import hashlib
 import cv2
 import numpy as np
 import insightface
 from insightface.app import FaceAnalysis
+from insightface.app.common import Face as DetectedFace
 from insightface.data import get_image as ins_get_image
+from insightface.utils import face_align
 from loguru import logger
-from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Iterator, Set, Tuple, Optional, Union
+from dataclasses import dataclass, replace
 from PIL import Image
 from pathlib import Path
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+MODEL_NAME = 'buffalo_l'
+# int8 galleries are widened to float32 this many rows at a time for scoring, so no full-size
+# copy of the gallery is made per frame
+GALLERY_SCORE_BLOCK = 1024
+# Detector input size; larger frames are area-downscaled to fit before detection
+DET_SIZE = (640, 640)
+
+# Frames are compared as a small grid of block averages; when no block changed by more than
+# the motion threshold (recognition.motion_threshold, default MOTION_THRESHOLD) grey levels since the last detection
+# on that camera, the previous faces are reused
+MOTION_GRID = (16, 16)
+MOTION_THRESHOLD = 4
+# Reuse counts are logged at DEBUG level once per this many gated frames
+MOTION_STATS_INTERVAL = 500
+
+# A camera face reuses the embedding of a face from that camera's previous detection only when it
+# continues it: boxes overlap by at least TRACK_MIN_IOU, and the aligned crops, compared as greyscale
+# thumbnails of TRACK_THUMB_SIZE, differ by at most TRACK_MAX_CROP_DIFF grey levels on average.
+# The thumbnail is the one the embedding was computed from, so a face cannot drift away from it.
+TRACK_MIN_IOU = 0.7
+TRACK_THUMB_SIZE = (28, 28)
+TRACK_MAX_CROP_DIFF = 6.0
+
+# Embeddings of known face images, keyed by content hash, so unchanged images are not re-embedded at startup
+GALLERY_CACHE = Path('./models') / f'{MODEL_NAME}_gallery.npz'
 
 @dataclass
 class Face:
     bbox: np.ndarray  # [x1, y1, x2, y2]
     kps: np.ndarray   # 5 key points
     det_score: float  # detection score
-    embedding: np.ndarray
+    embedding: np.ndarray  # unit length
     age: Optional[int] = None
     gender: Optional[str] = None  # 'Male' or 'Female'
-    face_img: Optional[np.ndarray] = None
+    face_img: Optional[np.ndarray] = None  # view into the source frame; copy it before keeping it
+
+GENDER_CODES = {None: 0, 'Male': 1, 'Female': 2}
+GENDER_NAMES = {code: name for name, code in GENDER_CODES.items()}
+
+@dataclass
+class FaceBatch:
+    """All faces detected in one frame, stored as one array per field"""
+    bboxes: np.ndarray      # (N, 4) float32
+    kpss: np.ndarray        # (N, 5, 2) float32
+    det_scores: np.ndarray  # (N,) float32
+    embeddings: np.ndarray  # (N, D) float32, rows of unit length
+    ages: np.ndarray        # (N,) int16, -1 where unknown
+    genders: np.ndarray     # (N,) uint8, see GENDER_CODES
+    face_imgs: List[Optional[np.ndarray]]
+
+    def __len__(self) -> int:
+        return len(self.det_scores)
+
+    def __getitem__(self, i: int) -> Face:
+        """Single-face view for code that works on Face objects"""
+        age = int(self.ages[i])
+        return Face(
+            bbox=self.bboxes[i],
+            kps=self.kpss[i],
+            det_score=float(self.det_scores[i]),
+            embedding=self.embeddings[i],
+            age=age if age >= 0 else None,
+            gender=GENDER_NAMES[int(self.genders[i])],
+            face_img=self.face_imgs[i]
+        )
+
+    def __iter__(self) -> Iterator[Face]:
+        return (self[i] for i in range(len(self)))
+
+@dataclass
+class FaceMatches:
+    """Recognition results for a batch of faces, stored as one array per field"""
+    known_idx: np.ndarray     # (N,) int32, index into known_faces, -1 where unmatched
+    names: List[Optional[str]]  # name of the matched known face, None where unmatched
+    confidences: np.ndarray   # (N,) float32, similarity of the closest known face
+
+    @property
+    def known_mask(self) -> np.ndarray:
+        return self.known_idx >= 0
+
+    def __len__(self) -> int:
+        return len(self.known_idx)
+
+@dataclass
+class _FaceTrack:
+    """A camera face whose embedding can be reused by the same face in the next detection"""
+    bbox: np.ndarray       # [x1, y1, x2, y2] in the latest detection
+    thumb: np.ndarray      # greyscale aligned crop the embedding was computed from, see TRACK_THUMB_SIZE
+    embedding: np.ndarray
+    reuses: int = 0        # detections that reused the embedding since it was computed
+
+def _iou(a: np.ndarray, b: np.ndarray) -> float:
+    """Intersection over union of two [x1, y1, x2, y2] boxes"""
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    return float(inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter))
 
 @dataclass
 class KnownFace:
@@ -27,6 +122,20 @@ class KnownFace:
     embedding: np.ndarray
     image_path: str
 
+@dataclass(frozen=True)
+class _Gallery:
+    """
+    Known faces with their matrix, published as one immutable object so recognition on the
+    frame processor thread always sees the rows, scales and names of the same gallery
+    """
+    faces: Tuple[KnownFace, ...]
+    # L2-normalised known embeddings, one row per entry in faces;
+    # with gallery_dtype 'int8' the rows are quantised and scale holds each row's scale
+    matrix: Optional[np.ndarray] = None
+    scale: Optional[np.ndarray] = None
+    # Incremented whenever the gallery is rebuilt, so callers can tell cached matches are stale
+    version: int = 0
+
 class FaceDetector:
     def __init__(self, config: dict):
         self.config = config
@@ -35,21 +144,52 @@ class FaceDetector:
         self.max_batch_size = config['recognition']['max_batch_size']
         self.device = config['recognition']['device']
         self.analysis_enabled = config['recognition'].get('analysis_enabled', True)
+        self.gallery_dtype = config['recognition'].get('gallery_dtype', 'float32')
+        # Detections a tracked camera face may reuse its embedding for; 0 always re-embeds
+        self.embedding_reuse_frames = config['recognition'].get('embedding_reuse_frames', 10)
+        # Largest block change (grey levels) that still counts as a static frame; negative disables the gate
+        self.motion_threshold = config['recognition'].get('motion_threshold', MOTION_THRESHOLD)
         self.model = self._load_model()
-        self.known_faces: List[KnownFace] = []
+        # Recognition runs batched over all faces in a frame instead of inside FaceAnalysis.get
+        self.rec_model = self.model.models.pop('recognition')
+        # Replaced as a whole by _publish_gallery, never changed in place; readers take it once
+        self._gallery = _Gallery(faces=())
+        # Serialises gallery updates (from the GUI thread and the face manager's save tasks)
+        self._gallery_lock = threading.Lock()
+        # (path, mtime_ns, size, sha1) of the images currently stored in GALLERY_CACHE
+        self._gallery_files: Set[Tuple[str, int, int, str]] = set()
+        # Picked on the first face, depending on how this InsightFace build reports gender
+        self._gender_fn = None
+        # camera_id -> (motion thumbnail, faces) from the last detection on that camera
+        self._last_detection: Dict[int, Tuple[np.ndarray, FaceBatch]] = {}
+        # Frames that reused the last detection, and frames that ran the model
+        self._motion_hits = 0
+        self._motion_misses = 0
+        # camera_id -> faces of the last embedding pass on that camera, see TRACK_MIN_IOU
+        self._face_tracks: Dict[int, List[_FaceTrack]] = {}
         
+    @property
+    def known_faces(self) -> Tuple[KnownFace, ...]:
+        """Known faces of the current gallery"""
+        return self._gallery.faces
+
+    @property
+    def gallery_version(self) -> int:
+        """Version of the current gallery, incremented on every change"""
+        return self._gallery.version
+
     def _load_model(self) -> FaceAnalysis:
         """Load Model insightface"""
         try:
             model = FaceAnalysis(
-                name='buffalo_l',
+                name=MODEL_NAME,
                 root='./models',
                 allowed_modules=['detection', 'recognition', 'genderage']
             )
             model.prepare(
                 ctx_id=0 if self.device == 'cuda' else -1,
                 det_thresh=self.detection_threshold,
-                det_size=(640, 640)
+                det_size=DET_SIZE
             )
             logger.success("Face detection model loaded successfully")
             return model
@@ -60,163 +200,578 @@ class FaceDetector:
     def load_known_faces(self, known_faces_dir: str) -> None:
         """Load known faces from directory"""
         try:
-            self.known_faces.clear()
             known_faces_dir = Path(known_faces_dir)
             
             if not known_faces_dir.exists():
                 logger.warning(f"Known faces directory {known_faces_dir} does not exist")
+                with self._gallery_lock:
+                    self._publish_gallery([])
                 return
                 
-            for face_file in known_faces_dir.glob('*.*'):
-                if face_file.suffix.lower() not in ['.jpg', '.jpeg', '.png']:
-                    continue
-                    
-                try:
-                    img = cv2.imread(str(face_file))
-                    if img is None:
-                        logger.warning(f"Could not read image {face_file}")
+            cache, files = self._load_gallery_cache()
+            # path -> (mtime_ns, size, sha1); files unchanged since they were cached are not even read
+            known_files = {path: (mtime_ns, size, sha1) for path, mtime_ns, size, sha1 in files}
+            entries = []  # ((path, mtime_ns, size, sha1), embedding or a pending Future)
+            
+            # Decoding and inference release the GIL, so cache misses are embedded in parallel
+            with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+                for face_file in known_faces_dir.glob('*.*'):
+                    if face_file.suffix.lower() not in ['.jpg', '.jpeg', '.png']:
                         continue
                         
-                    faces = self.model.get(img)
-                    if len(faces) == 0:
-                        logger.warning(f"No faces found in {face_file}")
-                        continue
+                    try:
+                        st = face_file.stat()
+                        known = known_files.get(str(face_file))
+                        if known is not None and known[:2] == (st.st_mtime_ns, st.st_size) and known[2] in cache:
+                            sha1 = known[2]
+                            embedding = cache[sha1]
+                        else:
+                            data = face_file.read_bytes()
+                            sha1 = hashlib.sha1(data).hexdigest()
+                            embedding = cache.get(sha1)
+                            if embedding is None:
+                                embedding = executor.submit(self._embed_image, face_file, data)
+                        entries.append(((str(face_file), st.st_mtime_ns, st.st_size, sha1), embedding))
                         
-                    # Use the first face found in the image
-                    face = faces[0]
-                    name = face_file.stem
-                    self.known_faces.append(KnownFace(
-                        name=name,
-                        embedding=face.embedding,
-                        image_path=str(face_file)
-                    ))
-                    logger.info(f"Loaded known face: {name}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing {face_file}: {e}")
+                    except Exception as e:
+                        logger.error(f"Error processing {face_file}: {e}")
+                        
+            loaded = []
+            known_faces = []
+            for file_info, embedding in entries:
+                face_file, sha1 = Path(file_info[0]), file_info[3]
+                if isinstance(embedding, Future):
+                    try:
+                        embedding = embedding.result()
+                    except Exception as e:
+                        logger.error(f"Error processing {face_file}: {e}")
+                        continue
+                    if embedding is None:
+                        continue
+                    cache[sha1] = embedding
                     
-            logger.info(f"Loaded {len(self.known_faces)} known faces")
+                name = face_file.stem
+                loaded.append(file_info)
+                known_faces.append(KnownFace(
+                    name=name,
+                    embedding=embedding,
+                    image_path=str(face_file)
+                ))
+                logger.info(f"Loaded known face: {name}")
+                
+            self._save_gallery_cache(loaded, cache)
+            with self._gallery_lock:
+                self._publish_gallery(known_faces)
+            logger.info(f"Loaded {len(known_faces)} known faces")
             
         except Exception as e:
             logger.error(f"Error loading known faces: {e}")
             raise
 
-    def detect_faces(self, image: np.ndarray) -> List[Face]:
-        """Detect faces in an image"""
+    def _embed_image(self, face_file: Path, data: bytes) -> Optional[np.ndarray]:
+        """Embed the first face in an encoded image, or return None if there is none"""
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            logger.warning(f"Could not read image {face_file}")
+            return None
+            
+        faces = self._analyze(img)
+        if len(faces) == 0:
+            logger.warning(f"No faces found in {face_file}")
+            return None
+            
+        # Use the first face found in the image
+        return faces[0].embedding
+
+    def _load_gallery_cache(self) -> Tuple[Dict[str, np.ndarray], List[Tuple[str, int, int, str]]]:
+        """Read cached known face embeddings keyed by image SHA-1, and the (path, mtime_ns, size, sha1) they came from"""
+        if not GALLERY_CACHE.exists():
+            return {}, []
         try:
-            faces = self.model.get(image)
-            results = []
+            with np.load(GALLERY_CACHE) as data:
+                if str(data['model']) != MODEL_NAME:
+                    return {}, []
+                hashes = data['sha1'].tolist()
+                cache = dict(zip(hashes, data['embedding']))
+                # Caches written before file stats were recorded only map hashes
+                files = list(zip(data['path'].tolist(), data['mtime_ns'].tolist(), data['size'].tolist(), hashes)) \
+                    if 'path' in data.files else []
+            self._gallery_files = set(files)
+            return cache, files
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable gallery cache {GALLERY_CACHE}: {e}")
+            return {}, []
+
+    def _save_gallery_cache(self, files: List[Tuple[str, int, int, str]], cache: Dict[str, np.ndarray]) -> None:
+        """Rewrite the gallery cache with the given (path, mtime_ns, size, sha1) images, if it changed"""
+        if set(files) == self._gallery_files:
+            return
+        try:
+            GALLERY_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            embeddings = [cache[sha1] for _, _, _, sha1 in files]
+            np.savez_compressed(
+                GALLERY_CACHE,
+                model=np.array(MODEL_NAME),
+                sha1=np.array([sha1 for _, _, _, sha1 in files], dtype='U40'),
+                path=np.array([path for path, _, _, _ in files], dtype=str),
+                mtime_ns=np.array([mtime_ns for _, mtime_ns, _, _ in files], dtype=np.int64),
+                size=np.array([size for _, _, size, _ in files], dtype=np.int64),
+                embedding=np.stack(embeddings) if embeddings else np.empty((0, 0), np.float32)
+            )
+            self._gallery_files = set(files)
+        except Exception as e:
+            logger.warning(f"Could not write gallery cache {GALLERY_CACHE}: {e}")
+
+    @staticmethod
+    def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+        """Scale each row to unit length, leaving zero rows as they are"""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+    @staticmethod
+    def _quantize_rows(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Symmetric int8 quantisation with one scale per row"""
+        scale = np.abs(matrix).max(axis=1) / 127
+        scale[scale == 0] = 1.0
+        q = np.rint(matrix / scale[:, np.newaxis]).astype(np.int8)
+        return q, scale.astype(np.float32)
+
+    def _publish_gallery(self, known_faces: List[KnownFace], matrix: Optional[np.ndarray] = None,
+                         scale: Optional[np.ndarray] = None) -> None:
+        """
+        Build the gallery matrix for known_faces (unless it is given) and make it the current
+        gallery in one assignment. Callers hold _gallery_lock.
+        """
+        if matrix is None and known_faces:
+            matrix = self._normalize_rows(np.stack([kf.embedding for kf in known_faces]).astype(np.float32))
+            if self.gallery_dtype == 'int8':
+                matrix, scale = self._quantize_rows(matrix)
+        self._gallery = _Gallery(tuple(known_faces), matrix, scale, self._gallery.version + 1)
+
+    def _score(self, probe_matrix: np.ndarray, gallery: _Gallery) -> np.ndarray:
+        """Cosine similarity of normalised probes against all known faces of a gallery"""
+        known, known_scale = gallery.matrix, gallery.scale
+        if known_scale is None:
+            return probe_matrix @ known.T
+        probe_q, probe_scale = self._quantize_rows(probe_matrix)
+        # A float32 (BLAS) product of int8 values is exact: each 512-d sum stays below 2**24
+        probe_q = probe_q.astype(np.float32)
+        scores = np.empty((len(probe_q), len(known)), dtype=np.float32)
+        for start in range(0, len(known), GALLERY_SCORE_BLOCK):
+            block = known[start:start + GALLERY_SCORE_BLOCK]
+            np.matmul(probe_q, block.astype(np.float32).T, out=scores[:, start:start + len(block)])
+        scores *= probe_scale[:, np.newaxis]
+        scores *= known_scale[np.newaxis, :]
+        return scores
+
+    def _best_matches(self, probe_matrix: np.ndarray, gallery: _Gallery) -> Tuple[np.ndarray, np.ndarray]:
+        """Index and similarity of the closest known face for each probe"""
+        similarities = self._score(probe_matrix, gallery)
+        best_idx = similarities.argmax(axis=1)
+        return best_idx, similarities[np.arange(len(probe_matrix)), best_idx]
+
+    def _embed(self, detections: list, camera_ids: Optional[List[int]] = None) -> None:
+        """
+        Set face.embedding to the L2-normalised embedding for (image, face) pairs, running recognition in batches.
+
+        With camera_ids (one per detection), a face that continues a face from the previous pass on
+        its camera reuses that embedding, see TRACK_MIN_IOU; the cameras' tracks are then replaced
+        by this pass's faces. Tracks are not locked, so only the camera processing path passes camera_ids.
+        """
+        crops = [face_align.norm_crop(image, landmark=face.kps, image_size=self.rec_model.input_size[0])
+                 for image, face in detections]
+        faces = [face for _, face in detections]
+        track_faces = camera_ids is not None and self.embedding_reuse_frames > 0
+        tracks: Dict[int, List[_FaceTrack]] = {}
+        if track_faces:
+            thumbs = [self._track_thumbnail(crop) for crop in crops]
+            misses = []
+            for i, (face, camera_id) in enumerate(zip(faces, camera_ids)):
+                track = self._continued_track(camera_id, face.bbox, thumbs[i], tracks.get(camera_id, ()))
+                if track is None:
+                    misses.append(i)
+                    continue
+                face.embedding = track.embedding
+                tracks.setdefault(camera_id, []).append(
+                    _FaceTrack(face.bbox, track.thumb, track.embedding, track.reuses + 1))
+            crops = [crops[i] for i in misses]
+            faces = [faces[i] for i in misses]
             
-            for face in faces:
-                face_img = self._extract_face_image(image, face.bbox)
+        for start in range(0, len(crops), self.max_batch_size):
+            embeddings = self._normalize_rows(self.rec_model.get_feat(crops[start:start + self.max_batch_size]))
+            for face, embedding in zip(faces[start:start + self.max_batch_size], embeddings):
+                face.embedding = embedding
+                
+        if track_faces:
+            for i, face in zip(misses, faces):
+                tracks.setdefault(camera_ids[i], []).append(_FaceTrack(face.bbox, thumbs[i], face.embedding))
+            for camera_id in set(camera_ids):
+                self._face_tracks[camera_id] = tracks.get(camera_id, [])
 
-                results.append(Face(
-                    bbox=face.bbox,
-                    kps=face.kps,
-                    det_score=face.det_score,
-                    embedding=face.embedding,
-                    age=self._get_age(face),
-                    gender=self._get_gender(face),
-                    face_img=face_img
-                ))
+    def _continued_track(self, camera_id: int, bbox: np.ndarray, thumb: np.ndarray,
+                         taken: List[_FaceTrack]) -> Optional[_FaceTrack]:
+        """The track of camera_id that a face continues, if any; tracks already continued this pass are skipped"""
+        best, best_iou = None, TRACK_MIN_IOU
+        for track in self._face_tracks.get(camera_id, ()):
+            if track.reuses >= self.embedding_reuse_frames or any(t.thumb is track.thumb for t in taken):
+                continue
+            iou = _iou(track.bbox, bbox)
+            if iou >= best_iou:
+                best, best_iou = track, iou
+        # The crop check keeps a different person at the same spot from inheriting the embedding
+        if best is None or cv2.norm(thumb, best.thumb, cv2.NORM_L1) > TRACK_MAX_CROP_DIFF * thumb.size:
+            return None
+        return best
+
+    @staticmethod
+    def _track_thumbnail(crop: np.ndarray) -> np.ndarray:
+        """Greyscale thumbnail of an aligned face crop, see TRACK_THUMB_SIZE"""
+        grey = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(grey, TRACK_THUMB_SIZE, interpolation=cv2.INTER_AREA)
+
+    def _get_faces(self, image: np.ndarray) -> list:
+        """
+        Equivalent of FaceAnalysis.get (without recognition). Frames larger than DET_SIZE are
+        detected on an INTER_AREA downscaled copy, which is cleaner than the detector's own
+        bilinear resize of the full frame; attributes still come from the full-resolution image.
+        """
+        h, w = image.shape[:2]
+        scale = min(DET_SIZE[0] / w, DET_SIZE[1] / h)
+        if scale < 1:
+            small = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))),
+                               interpolation=cv2.INTER_AREA)
+            bboxes, kpss = self.model.det_model.detect(small, max_num=0, metric='default')
+            bboxes[:, :4] /= scale
+            if kpss is not None:
+                kpss /= scale
+        else:
+            bboxes, kpss = self.model.det_model.detect(image, max_num=0, metric='default')
+            
+        faces = []
+        for i in range(bboxes.shape[0]):
+            face = DetectedFace(bbox=bboxes[i, :4], kps=kpss[i] if kpss is not None else None,
+                                det_score=bboxes[i, 4])
+            for taskname, model in self.model.models.items():
+                if taskname != 'detection':
+                    model.get(image, face)
+            faces.append(face)
+        return faces
+
+    def _analyze(self, image: np.ndarray) -> list:
+        """Run detection and attribute models, then embed all detected faces in batches"""
+        faces = self._get_faces(image)
+        if faces:
+            self._embed([(image, face) for face in faces])
+        return faces
+
+    def detect_faces(self, image: np.ndarray, camera_id: Optional[int] = None) -> FaceBatch:
+        """
+        Detect faces in an image.
+
+        With a camera_id, a frame that is unchanged since the last detection on that
+        camera reuses the faces found then instead of running the model again.
+        """
+        return self.detect_faces_batch([image], [camera_id])[0]
+
+    def detect_faces_batch(self, images: List[np.ndarray],
+                           camera_ids: Optional[List[Optional[int]]] = None) -> List[FaceBatch]:
+        """
+        Detect faces in several images, e.g. the current frame of each camera.
+
+        Detection runs per image, but the faces of all images are embedded together in
+        shared recognition batches. camera_ids enables the motion gate as in detect_faces.
+        """
+        if camera_ids is None:
+            camera_ids = [None] * len(images)
+        try:
+            results: List[Optional[FaceBatch]] = [None] * len(images)
+            pending = []  # (index, motion thumbnail or None, detected faces)
+            for i, (image, camera_id) in enumerate(zip(images, camera_ids)):
+                thumb = None
+                if camera_id is not None and self.motion_threshold >= 0:
+                    thumb = self._motion_thumbnail(image)
+                    last = self._last_detection.get(camera_id)
+                    if last is not None and last[0].shape == thumb.shape \
+                            and cv2.norm(thumb, last[0], cv2.NORM_INF) <= self.motion_threshold:
+                        self._motion_hits += 1
+                        self._log_motion_stats()
+                        results[i] = last[1]
+                        continue
+                    self._motion_misses += 1
+                    self._log_motion_stats()
+                pending.append((i, thumb, self._get_faces(image)))
+                
+            self._embed(
+                [(images[i], face) for i, _, faces in pending for face in faces],
+                [camera_ids[i] for i, _, faces in pending for _ in faces] if None not in camera_ids else None
+            )
+            # Cameras where nothing was detected have no faces left to continue
+            for i, _, faces in pending:
+                if not faces and camera_ids[i] is not None:
+                    self._face_tracks.pop(camera_ids[i], None)
+            
+            for i, thumb, faces in pending:
+                batch = self._to_batch(images[i], faces)
+                if thumb is not None:
+                    self._last_detection[camera_ids[i]] = (thumb, batch)
+                results[i] = batch
             return results
         except Exception as e:
-            logger.error(f"Error detecting faces: {e}")
-            return []
+            logger.opt(lazy=True).error("Error detecting faces: {}", lambda: e)
+            return [self._empty_batch() for _ in images]
 
-    def recognize_faces(self, faces: List[Face]) -> List[Tuple[Face, Optional[KnownFace], float]]:
-        """Recognize faces against known faces database"""
-        results = []
+    def _log_motion_stats(self) -> None:
+        """Log motion gate reuse counts once every MOTION_STATS_INTERVAL gated frames"""
+        total = self._motion_hits + self._motion_misses
+        if total % MOTION_STATS_INTERVAL == 0:
+            logger.debug(f"Motion gate reused {self._motion_hits}/{total} frames, ran detection on {self._motion_misses}")
+
+    @staticmethod
+    def _motion_thumbnail(image: np.ndarray) -> np.ndarray:
+        """
+        Block-averaged greyscale thumbnail used to tell whether a frame changed.
+        Kept as uint8 so two thumbnails compare with a single cv2.norm(NORM_INF) call,
+        which takes the absolute difference without any intermediate arrays.
+        """
+        small = cv2.resize(image, MOTION_GRID, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def _to_batch(self, image: np.ndarray, faces: list) -> FaceBatch:
+        """Pack embedded InsightFace detections from one image into a FaceBatch"""
+        if not faces:
+            return self._empty_batch()
+            
+        ages = [self._get_age(face) for face in faces]
+        bboxes = np.stack([face.bbox for face in faces]).astype(np.float32)
+        return FaceBatch(
+            bboxes=bboxes,
+            kpss=np.stack([face.kps for face in faces]).astype(np.float32),
+            det_scores=np.array([face.det_score for face in faces], dtype=np.float32),
+            embeddings=np.stack([face.embedding for face in faces]),
+            ages=np.array([-1 if age is None else age for age in ages], dtype=np.int16),
+            genders=np.array([GENDER_CODES[self._get_gender(face)] for face in faces], dtype=np.uint8),
+            face_imgs=self._extract_face_images(image, bboxes)
+        )
+
+    @staticmethod
+    def _empty_batch() -> FaceBatch:
+        return FaceBatch(
+            bboxes=np.empty((0, 4), np.float32),
+            kpss=np.empty((0, 5, 2), np.float32),
+            det_scores=np.empty(0, np.float32),
+            embeddings=np.empty((0, 0), np.float32),
+            ages=np.empty(0, np.int16),
+            genders=np.empty(0, np.uint8),
+            face_imgs=[]
+        )
+
+    def match_faces(self, faces: Union[FaceBatch, List[Face]]) -> FaceMatches:
+        """Match faces against the known faces database, as one array per result field"""
+        return self._match(faces, self._gallery)
+
+    def _match(self, faces: Union[FaceBatch, List[Face]], gallery: _Gallery) -> FaceMatches:
+        n = len(faces)
+        known_idx = np.full(n, -1, dtype=np.int32)
+        confidences = np.zeros(n, dtype=np.float32)
+        names: List[Optional[str]] = [None] * n
         
-        if not self.known_faces:
-            return [(face, None, 0.0) for face in faces]
+        known_faces = gallery.faces
+        if not known_faces:
+            return FaceMatches(known_idx, names, confidences)
             
         try:
-            # Get all known face embeddings
-            known_embeddings = np.array([kf.embedding for kf in self.known_faces])
-            
-            for face in faces:
-                if face.embedding is None or len(face.embedding) == 0:
-                    results.append((face, None, 0.0))
-                    continue
-                    
-                # Calculate cosine similarity between current face and all known faces
-                similarities = np.dot(known_embeddings, face.embedding) / (
-                    np.linalg.norm(known_embeddings, axis=1) * np.linalg.norm(face.embedding)
-                )
+            if isinstance(faces, FaceBatch):
+                # Every detected face has an embedding, already stacked and normalised
+                probes = np.arange(n)
+                probe_matrix = faces.embeddings
+            else:
+                probes = np.array([i for i, face in enumerate(faces)
+                                   if face.embedding is not None and len(face.embedding) > 0], dtype=np.intp)
+                if len(probes):
+                    probe_matrix = self._normalize_rows(np.stack([faces[i].embedding for i in probes]))
+            if not len(probes):
+                return FaceMatches(known_idx, names, confidences)
                 
-                max_idx = np.argmax(similarities)
-                max_similarity = similarities[max_idx]
+            # Cosine similarity of every probe against every known face in one matrix product
+            best_idx, best = self._best_matches(probe_matrix, gallery)
+            confidences[probes] = best
+            matched = best > self.recognition_threshold
+            known_idx[probes[matched]] = best_idx[matched]
+            for i in np.flatnonzero(known_idx >= 0).tolist():
+                names[i] = known_faces[known_idx[i]].name
                 
-                if max_similarity > self.recognition_threshold:
-                    results.append((face, self.known_faces[max_idx], max_similarity))
-                else:
-                    results.append((face, None, max_similarity))
-                    
         except Exception as e:
-            logger.error(f"Error recognizing faces: {e}")
-            return [(face, None, 0.0) for face in faces]
+            logger.opt(lazy=True).error("Error recognizing faces: {}", lambda: e)
+            known_idx.fill(-1)
+            confidences.fill(0.0)
+            names = [None] * n
             
-        return results
+        return FaceMatches(known_idx, names, confidences)
+
+    def recognize_faces(self, faces: Union[FaceBatch, List[Face]]) -> List[Tuple[Face, Optional[KnownFace], float]]:
+        """Recognize faces against known faces database"""
+        gallery = self._gallery
+        matches = self._match(faces, gallery)
+        known_faces = gallery.faces
+        return [(face, known_faces[idx] if idx >= 0 else None, confidence)
+                for face, idx, confidence in zip(faces, matches.known_idx.tolist(), matches.confidences.tolist())]
+
+    def _extract_face_images(self, image: np.ndarray, bboxes: np.ndarray) -> List[np.ndarray]:
+        """
+        Extract the face regions of all (N, 4) bboxes from image.
 
-    def _extract_face_image(self, image: np.ndarray, bbox: np.ndarray) -> np.ndarray:
-        """Extract face region from image"""
-        x1, y1, x2, y2 = map(int, bbox)
-        x1 = max(0, x1)
-        y1 = max(0, y1)
-        x2 = min(image.shape[1], x2)
-        y2 = min(image.shape[0], y2)
+        Each crop is a view that shares memory with image (and keeps it alive);
+        it is only copied when a caller needs to own it.
+        """
+        boxes = bboxes.astype(np.int32)
+        np.clip(boxes[:, 0::2], 0, image.shape[1], out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0, image.shape[0], out=boxes[:, 1::2])
         
-        if x1 >= x2 or y1 >= y2:
-            return np.array([])
-            
-        return image[y1:y2, x1:x2].copy()
+        return [image[y1:y2, x1:x2] if x1 < x2 and y1 < y2 else np.array([])
+                for x1, y1, x2, y2 in boxes.tolist()]
 
     def add_known_face(self, image: np.ndarray, name: str, save_dir: str) -> bool:
         """Add a new known face to the database"""
+        return self.add_known_faces_bulk([image], [name], save_dir)[0]
+
+    def add_known_faces_bulk(self, images: List[np.ndarray], names: List[str], save_dir: str) -> List[bool]:
+        """Add several known faces at once, embedding them in a single recognition batch"""
+        results = [False] * len(images)
+        added = []
         try:
             save_dir = Path(save_dir)
             save_dir.mkdir(parents=True, exist_ok=True)
             
-            faces = self.detect_faces(image)
-            if not faces:
-                logger.warning("No faces found in the provided image")
-                return False
-                
-            # Use the first face found
-            face = faces[0]
+            # Use the first face found in each image
+            detections = []
+            for i, image in enumerate(images):
+                faces = self._get_faces(image)
+                if not faces:
+                    logger.warning(f"No faces found in the provided image for {names[i]}")
+                    continue
+                detections.append((i, faces[0]))
+            self._embed([(images[i], face) for i, face in detections])
             
-            # Save the face image
             timestamp = int(time.time())
-            face_path = save_dir / f"{name}_{timestamp}.jpg"
-            cv2.imwrite(str(face_path), image)
-            
-            # Add to known faces
-            self.known_faces.append(KnownFace(
-                name=name,
-                embedding=face.embedding,
-                image_path=str(face_path)
-            ))
-            
-            logger.info(f"Added new known face: {name}")
-            return True
+            for i, face in detections:
+                # Save the face image
+                face_path = save_dir / f"{names[i]}_{timestamp}.jpg"
+                ok, encoded = cv2.imencode('.jpg', images[i])
+                if not ok:
+                    logger.error(f"Could not encode image for {names[i]}")
+                    continue
+                face_path.write_bytes(encoded.tobytes())
+                
+                # Add to known faces
+                added.append(KnownFace(
+                    name=names[i],
+                    embedding=face.embedding,
+                    image_path=str(face_path)
+                ))
+                results[i] = True
+                logger.info(f"Added new known face: {names[i]}")
+                
+        except Exception as e:
+            logger.error(f"Error adding known faces: {e}")
             
+        if added:
+            with self._gallery_lock:
+                self._publish_gallery(list(self._gallery.faces) + added)
+        return results
+
+    @staticmethod
+    def _known_face_index(known_faces: Tuple[KnownFace, ...], image_path: Union[str, Path]) -> Optional[int]:
+        """Index in known_faces of the entry loaded from image_path"""
+        image_path = Path(image_path)
+        for i, known_face in enumerate(known_faces):
+            if Path(known_face.image_path) == image_path:
+                return i
+        return None
+
+    def remove_known_face(self, image_path: Union[str, Path]) -> bool:
+        """Drop the known face loaded from image_path, without reloading the others"""
+        with self._gallery_lock:
+            gallery = self._gallery
+            idx = self._known_face_index(gallery.faces, image_path)
+            if idx is None:
+                return False
+            removed = gallery.faces[idx]
+            keep = np.arange(len(gallery.faces)) != idx
+            self._publish_gallery(
+                [kf for i, kf in enumerate(gallery.faces) if i != idx],
+                gallery.matrix[keep] if len(gallery.faces) > 1 else None,
+                gallery.scale[keep] if gallery.scale is not None and len(gallery.faces) > 1 else None
+            )
+        logger.info(f"Removed known face: {removed.name}")
+        return True
+
+    def rename_known_face(self, old_path: Union[str, Path], new_path: Union[str, Path]) -> bool:
+        """Follow a renamed face image; the embedding is unchanged"""
+        with self._gallery_lock:
+            gallery = self._gallery
+            idx = self._known_face_index(gallery.faces, old_path)
+            if idx is None:
+                return False
+            known_faces = list(gallery.faces)
+            known_faces[idx] = replace(known_faces[idx], name=Path(new_path).stem, image_path=str(new_path))
+            self._publish_gallery(known_faces, gallery.matrix, gallery.scale)
+        logger.info(f"Renamed known face to: {known_faces[idx].name}")
+        return True
+
+    def replace_known_face(self, image_path: Union[str, Path], image: np.ndarray) -> bool:
+        """Re-embed the known face stored at image_path after its image changed"""
+        try:
+            faces = self._analyze(image)
         except Exception as e:
-            logger.error(f"Error adding known face: {e}")
+            logger.error(f"Error embedding known face {image_path}: {e}")
+            return False
+        if not faces:
+            logger.warning(f"No faces found in {image_path}")
             return False
+            
+        with self._gallery_lock:
+            known_faces = list(self._gallery.faces)
+            idx = self._known_face_index(self._gallery.faces, image_path)
+            if idx is None:
+                known_faces.append(KnownFace(
+                    name=Path(image_path).stem,
+                    embedding=faces[0].embedding,
+                    image_path=str(image_path)
+                ))
+            else:
+                known_faces[idx] = replace(known_faces[idx], embedding=faces[0].embedding)
+            self._publish_gallery(known_faces)
+        logger.info(f"Updated known face: {Path(image_path).stem}")
+        return True
     
 
     def _get_age(self, face) -> Optional[int]:
         """Extract age estimation if available"""
         if not self.analysis_enabled:
             return None
-        return int(face.age) if hasattr(face, 'age') else None
+        # InsightFace already rounds the age to an int
+        return getattr(face, 'age', None)
     
 
     def _get_gender(self, face) -> Optional[str]:
         """Extract gender prediction if available"""
         if not self.analysis_enabled:
             return None
-        if not hasattr(face, 'sex') or face.sex is None:
+        sex = getattr(face, 'sex', None)
+        if sex is None:
             return None
-        return 'Female' if np.argmax(face.sex) == 1 else 'Male'
+        if self._gender_fn is None:
+            # Current InsightFace reports 'M'/'F'; older builds give a score per class
+            self._gender_fn = self._gender_from_label if isinstance(sex, str) else self._gender_from_scores
+        return self._gender_fn(sex)
+
+    @staticmethod
+    def _gender_from_label(sex: str) -> str:
+        return 'Female' if sex == 'F' else 'Male'
+
+    @staticmethod
+    def _gender_from_scores(sex) -> str:
+        return 'Female' if np.argmax(sex) == 1 else 'Male'
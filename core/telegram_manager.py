@@ -1,9 +1,14 @@
 import logging
 from telegram import Bot
 from telegram.error import TelegramError
+from concurrent.futures import Future
 from typing import Optional
 from pathlib import Path
 import asyncio
+import io
+import itertools
+import queue
+import threading
 import time
 
 class TelegramManager:
@@ -13,7 +18,27 @@ class TelegramManager:
         self.bot = None
         self.last_sent = 0
         self.min_interval = rate_limit
+        # The event loop runs for the lifetime of the manager on its own thread
         self.loop = asyncio.new_event_loop()
+        self._send_lock: Optional[asyncio.Lock] = None  # created on the loop thread
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            daemon=True,
+            name="TelegramLoop"
+        )
+        self._thread.start()
+        # Failed alerts are written to disk by a background thread so the loop never waits on I/O
+        self._fail_queue = queue.Queue(maxsize=1024)
+        self._fail_thread = threading.Thread(
+            target=self._fail_writer,
+            daemon=True,
+            name="TelegramFailWriter"
+        )
+        self._fail_thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
 
     async def _initialize_bot(self):
         """Initialize the Telegram bot asynchronously"""
@@ -25,22 +50,44 @@ class TelegramManager:
             logging.error(f"Failed to initialize Telegram bot: {e}")
             self.bot = None
 
-    def send_alert(self, message: str, image_path: Optional[Path] = None):
-        """Send alert to Telegram (blocking wrapper)"""
-        if not self.bot:
-            try:
-                self.loop.run_until_complete(self._initialize_bot())
-            except Exception as e:
-                logging.error(f"Telegram connection failed: {e}")
-                return
+    def send_alert(self, message: str, image_path: Optional[Path] = None, image_bytes: Optional[bytes] = None) -> Future:
+        """Queue an alert for Telegram and return without waiting for it to be sent
+
+        If the already-encoded image is passed as `image_bytes` it is sent directly
+        instead of being read back from `image_path`.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._send_alert(message, image_path, image_bytes), self.loop)
+
+    async def _send_alert(self, message: str, image_path: Optional[Path] = None, image_bytes: Optional[bytes] = None):
+        if self._send_lock is None:
+            self._send_lock = asyncio.Lock()
+
+        # One send at a time keeps the rate limit check and bot initialization consistent
+        async with self._send_lock:
+            if not self.bot:
+                try:
+                    await self._initialize_bot()
+                except Exception as e:
+                    logging.error(f"Telegram connection failed: {e}")
+                    return
+                if not self.bot:
+                    return
 
-        async def _send():
             now = time.time()
             if now - self.last_sent < self.min_interval:
                 logging.warning(f"Telegram rate limit reached ({self.min_interval}s)")
                 return
             try:
-                if image_path and image_path.exists():
+                if image_bytes:
+                    photo = io.BytesIO(image_bytes)
+                    photo.name = image_path.name if image_path else 'alert.jpg'  # upload filename and type
+                    await self.bot.send_photo(
+                        chat_id=self.chat_id,
+                        photo=photo,
+                        caption=message
+                    )
+                elif image_path and image_path.exists():
                     with open(image_path, 'rb') as photo:
                         await self.bot.send_photo(
                             chat_id=self.chat_id,
@@ -56,33 +103,81 @@ class TelegramManager:
                 logging.info("Telegram alert sent successfully")
             except TelegramError as e:
                 logging.error(f"Failed to send Telegram alert: {e}")
+            except Exception as e:
+                logging.error(f"Telegram alert failed: {str(e)}")
+                self._save_failed_alert(message, image_path)
+
+    def _save_failed_alert(self, message: str, image_path: Optional[Path]):
+        """Queue an alert for the local fallback, dropping the oldest one if the queue is full"""
+        item = (time.ctime(), message, image_path)
+        while True:
+            try:
+                self._fail_queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._fail_queue.get_nowait()
+                except queue.Empty:
+                    pass
 
+    def _fail_writer(self):
+        """Background thread that saves failed alerts locally"""
+        backup_dir = Path("failed_alert_images")
+        log_file = None  # opened on the first failure and kept open
+        # Images failed in the same second get distinct names
+        backup_count = itertools.count()
         try:
-            self.loop.run_until_complete(_send())
-        except Exception as e:
-            logging.error(f"Telegram alert failed: {str(e)}")
-            # Fallback to saving alert locally
-            with open("failed_alerts.log", "a") as f:
-                f.write(f"{time.ctime()}: {message}\n")
-            if image_path:
-                backup_dir = Path("failed_alert_images")
-                backup_dir.mkdir(exist_ok=True)
-                new_path = backup_dir / f"alert_{int(time.time())}.jpg"
+            while True:
+                item = self._fail_queue.get()
+                if item is None:
+                    break
+                when, message, image_path = item
                 try:
-                    image_path.rename(new_path)
+                    if log_file is None:
+                        log_file = open("failed_alerts.log", "a", buffering=1 << 16)
+                    log_file.write(f"{when}: {message}\n")
+                    if self._fail_queue.empty():
+                        log_file.flush()
                 except Exception as e:
-                    logging.error(f"Failed to backup alert image: {e}")
+                    logging.error(f"Failed to log alert locally: {e}")
+                if image_path:
+                    try:
+                        backup_dir.mkdir(exist_ok=True)
+                        new_path = backup_dir / f"alert_{int(time.time())}_{next(backup_count)}.jpg"
+                        image_path.rename(new_path)
+                    except Exception as e:
+                        logging.error(f"Failed to backup alert image: {e}")
+        finally:
+            if log_file is not None:
+                log_file.close()
     
+    async def _cancel_pending(self):
+        current = asyncio.current_task()
+        for task in asyncio.all_tasks():
+            if task is not current:
+                task.cancel()
+
     def shutdown(self):
         """Cleanup resources"""
         self._shutdown = True
         self.last_sent = 0
-        if self.loop.is_running():
-            self.loop.stop()
+        if self.loop.is_closed():
+            return
         
-        # Close all pending tasks
-        pending = asyncio.all_tasks(loop=self.loop)
-        for task in pending:
-            task.cancel()
+        # Close all pending tasks, then stop the loop thread
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_pending(), self.loop).result(timeout=2.0)
+        except Exception as e:
+            logging.error(f"Failed to cancel pending Telegram alerts: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=2.0)
         
-        self.loop.close()
\ No newline at end of file
+        if not self._thread.is_alive():
+            self.loop.close()
+            
+        # Let the writer drain what is queued, then stop it
+        try:
+            self._fail_queue.put(None, timeout=1.0)
+        except queue.Full:
+            logging.error("Failed alert queue did not drain before shutdown")
+        self._fail_thread.join(timeout=2.0)
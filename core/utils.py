@@ -1,10 +1,97 @@
 import cv2
+import functools
 import numpy as np
-from typing import Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 from loguru import logger
 import time
+from pathlib import Path
 from PyQt5.QtGui import QPixmap
 
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.5
+FONT_THICKNESS = 1
+
+def _text_width(text: str) -> int:
+    """Pixel width of a label"""
+    return cv2.getTextSize(text, FONT, FONT_SCALE, FONT_THICKNESS)[0][0]
+
+# Name, age, gender and camera labels repeat every frame, so their widths are cached;
+# confidence and time labels change constantly and are measured directly
+_stable_text_width = functools.lru_cache(maxsize=1024)(_text_width)
+
+def _draw_one(img: np.ndarray,
+              face_bbox: Tuple[int, int, int, int],
+              name: Optional[str] = None,
+              confidence: Optional[float] = None,
+              age: Optional[int] = None,
+              gender: Optional[str] = None,
+              camera_name: Optional[str] = None,
+              timestamp: Optional[float] = None) -> None:
+    """Draw one face's bounding box and information onto img in place"""
+    x1, y1, x2, y2 = map(int, face_bbox)
+    
+    # Draw bounding box
+    color = (0, 255, 0) if name else (0, 0, 255)
+    cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
+    
+    # Create info text, measuring each line as it is added
+    info_text = []
+    widths = []
+    def add(text, measure=_stable_text_width):
+        info_text.append(text)
+        widths.append(measure(text))
+    if name:
+        add(f"Name: {name}")
+    if confidence is not None:
+        add(f"Confidence: {confidence:.2f}", _text_width)
+    if age:
+        add(f"Age: {age}")
+    if gender:
+        add(f"Gender: {gender}")
+    if camera_name:
+        add(f"Camera: {camera_name}")
+    if timestamp:
+        time_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+        add(f"Time: {time_str}", _text_width)
+    
+    if not info_text:
+        return
+    
+    # Draw all text backgrounds with one fillPoly call
+    text_y = y1 - 10 if y1 - 10 > 10 else y2 + 20
+    bottoms = text_y - 20 * np.arange(len(info_text), dtype=np.int32)
+    rights = x1 + 5 + np.array(widths, dtype=np.int32)
+    backgrounds = np.empty((len(info_text), 4, 2), dtype=np.int32)
+    backgrounds[:, [0, 3], 0] = x1
+    backgrounds[:, [1, 2], 0] = rights[:, np.newaxis]
+    backgrounds[:, [0, 1], 1] = (bottoms - 15)[:, np.newaxis]
+    backgrounds[:, [2, 3], 1] = bottoms[:, np.newaxis]
+    cv2.fillPoly(img, list(backgrounds), color)
+    
+    for i, text in enumerate(info_text):
+        # Draw text
+        cv2.putText(img, text, 
+                   (x1 + 3, text_y - 5 - i * 20),
+                   FONT, FONT_SCALE, 
+                   (0, 0, 0), FONT_THICKNESS)
+
+def annotate_frame(image: np.ndarray, face_infos: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Draw several faces onto a single copy of the image.
+    Each entry of face_infos holds draw_face_info's keyword arguments, with the box under 'face_bbox'.
+    """
+    if not face_infos:
+        return image
+    try:
+        img = image.copy()
+        for info in face_infos:
+            _draw_one(img, **info)
+        return img
+        
+    except Exception as e:
+        logger.error(f"Error drawing face info: {e}")
+        return image
+
 def draw_face_info(image: np.ndarray, 
                   face_bbox: Tuple[int, int, int, int],
                   name: Optional[str] = None,
@@ -16,53 +103,13 @@ def draw_face_info(image: np.ndarray,
     """
     Draw face bounding box and information on the image
     """
-    try:
-        img = image.copy()
-        x1, y1, x2, y2 = map(int, face_bbox)
-        
-        # Draw bounding box
-        color = (0, 255, 0) if name else (0, 0, 255)
-        cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
-        
-        # Create info text
-        info_text = []
-        if name:
-            info_text.append(f"Name: {name}")
-        if confidence is not None:
-            info_text.append(f"Confidence: {confidence:.2f}")
-        if age:
-            info_text.append(f"Age: {age}")
-        if gender:
-            info_text.append(f"Gender: {gender}")
-        if camera_name:
-            info_text.append(f"Camera: {camera_name}")
-        if timestamp:
-            time_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
-            info_text.append(f"Time: {time_str}")
-        
-        # Draw text background
-        text_y = y1 - 10 if y1 - 10 > 10 else y2 + 20
-        for i, text in enumerate(info_text):
-            text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
-            cv2.rectangle(img, 
-                         (x1, text_y - 15 - i * 20),
-                         (x1 + text_size[0] + 5, text_y - i * 20),
-                         color, -1)
-            
-            # Draw text
-            cv2.putText(img, text, 
-                       (x1 + 3, text_y - 5 - i * 20),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, 
-                       (0, 0, 0), 1)
-                       
-        return img
-        
-    except Exception as e:
-        logger.error(f"Error drawing face info: {e}")
-        return image
+    return annotate_frame(image, [dict(
+        face_bbox=face_bbox, name=name, confidence=confidence, age=age,
+        gender=gender, camera_name=camera_name, timestamp=timestamp
+    )])
 
 def numpy_to_pixmap(image: np.ndarray) -> 'QPixmap':
-    """Convert numpy array to QPixmap"""
+    """Convert numpy array to QPixmap at its native size"""
     try:
         from PyQt5.QtGui import QImage, QPixmap
         from PyQt5.QtCore import Qt
@@ -70,6 +117,9 @@ def numpy_to_pixmap(image: np.ndarray) -> 'QPixmap':
         if image is None:
             return QPixmap()
             
+        # QImage wraps the array's memory directly, which needs a contiguous buffer
+        image = np.ascontiguousarray(image)
+        
         if len(image.shape) == 2:  # Grayscale
             h, w = image.shape
             qimg = QImage(image.data, w, h, w, QImage.Format_Grayscale8)
@@ -78,15 +128,69 @@ def numpy_to_pixmap(image: np.ndarray) -> 'QPixmap':
             bytes_per_line = ch * w
             qimg = QImage(image.data, w, h, bytes_per_line, QImage.Format_BGR888)
             
-        return QPixmap.fromImage(qimg).scaled(
-            w, h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        # Detach from the numpy buffer before it can be freed or drawn into again,
+        # and keep the 8/24-bit layout instead of letting Qt expand it to 32-bit
+        return QPixmap.fromImage(qimg.copy(), Qt.NoFormatConversion)
             
     except Exception as e:
         logger.error(f"Error converting numpy to QPixmap: {e}")
         return QPixmap()
 
+def _fit_size(w: int, h: int, max_width: int, max_height: int) -> Tuple[int, int]:
+    """Largest size with w:h aspect ratio that fits in max_width x max_height, in integer math"""
+    if w * max_height <= h * max_width:
+        return max(1, w * max_height // h), max_height
+    return max_width, max(1, h * max_width // w)
+
+def read_scaled_image(path: str, width: int, height: int) -> 'QImage':
+    """
+    Decode an image file straight to a QImage that fits width x height, keeping its aspect ratio.
+    The decoder produces the target size directly (JPEG can decode at reduced scale),
+    so large images are never held at full resolution. Safe to call from worker threads.
+    """
+    from PyQt5.QtGui import QImageReader
+    from PyQt5.QtCore import Qt
+    
+    reader = QImageReader(str(path))
+    size = reader.size()
+    if size.isValid():
+        size.scale(width, height, Qt.KeepAspectRatio)
+        reader.setScaledSize(size)
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(f"Could not read image: {reader.errorString()}")
+    return image
+
+def load_scaled_pixmap(path: str, width: int, height: int) -> 'QPixmap':
+    """Load an image file into a pixmap that fits width x height; see read_scaled_image"""
+    from PyQt5.QtGui import QPixmap
+    
+    return QPixmap.fromImage(read_scaled_image(path, width, height))
+
+def load_thumbnail(path: str, width: int, height: int) -> 'QPixmap':
+    """
+    Load a pixmap that fits width x height through a '.thumb.png' file next to the image.
+    The thumbnail is written on first use and reused until the image is newer than it.
+    """
+    from PyQt5.QtGui import QImageWriter, QPixmap
+    
+    path = Path(path)
+    thumb_path = path.with_suffix('.thumb.png')
+    try:
+        if thumb_path.stat().st_mtime >= path.stat().st_mtime:
+            image = read_scaled_image(thumb_path, width, height)
+            return QPixmap.fromImage(image)
+    except (OSError, ValueError):
+        pass  # missing, stale or unreadable thumbnail; rebuild it below
+        
+    image = read_scaled_image(path, width, height)
+    writer = QImageWriter(str(thumb_path), b'png')
+    if not writer.write(image):
+        logger.warning(f"Could not write thumbnail {thumb_path}: {writer.errorString()}")
+    return QPixmap.fromImage(image)
+
 def resize_image(image: np.ndarray, max_width: int = 800, max_height: int = 600) -> np.ndarray:
-    """Resize image while maintaining aspect ratio"""
+    """Resize image while maintaining aspect ratio (area filter, for stored thumbnails)"""
     try:
         if image is None:
             return None
@@ -96,12 +200,34 @@ def resize_image(image: np.ndarray, max_width: int = 800, max_height: int = 600)
         if w <= max_width and h <= max_height:
             return image
             
-        ratio = min(max_width / w, max_height / h)
-        new_w = int(w * ratio)
-        new_h = int(h * ratio)
-        
+        new_w, new_h = _fit_size(w, h, max_width, max_height)
         return cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
         
     except Exception as e:
         logger.error(f"Error resizing image: {e}")
-        return image
\ No newline at end of file
+        return image
+
+def resize_preview(image: np.ndarray, max_width: int, max_height: int,
+                   dst: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Resize a live frame for display, keeping its aspect ratio.
+    Uses the faster bilinear filter; pass the previous result as dst to reuse its buffer.
+    """
+    try:
+        if image is None:
+            return None
+            
+        h, w = image.shape[:2]
+        
+        if w <= max_width and h <= max_height:
+            return image
+            
+        new_w, new_h = _fit_size(w, h, max_width, max_height)
+        if dst is not None and dst.shape[:2] == (new_h, new_w) and dst.shape[2:] == image.shape[2:] \
+                and dst.flags.writeable:
+            return cv2.resize(image, (new_w, new_h), dst=dst, interpolation=cv2.INTER_LINEAR)
+        return cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        
+    except Exception as e:
+        logger.error(f"Error resizing image: {e}")
+        return image
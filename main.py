@@ -17,6 +17,7 @@ Created: 2025-05-21
 
 
 import sys
+import json
 import yaml
 from pathlib import Path
 from loguru import logger
@@ -26,6 +27,11 @@ from PyQt5.QtCore import Qt, QTimer
 
 from ui.main_window import MainWindow
 
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml bindings
+except ImportError:
+    from yaml import SafeLoader
+
 def load_config(config_path: str) -> dict:
     """
     Load the application's configuration from a YAML file.
@@ -38,6 +44,8 @@ def load_config(config_path: str) -> dict:
 
     Side Effects:
         - Creates necessary directories for screenshots, known faces, and logs if they do not exist.
+        - Writes a parsed JSON copy next to the YAML file (e.g. config.cache.json), which is
+          used instead of the YAML as long as it is newer.
 
     Raises:
         Exception: If the configuration file cannot be read or parsed.
@@ -46,13 +54,27 @@ def load_config(config_path: str) -> dict:
         config = load_config('config/config.yaml')
     """
     try:
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config_path = Path(config_path)
+        cache_path = config_path.with_suffix('.cache.json')
+        
+        config = None
+        if cache_path.exists() and cache_path.stat().st_mtime > config_path.stat().st_mtime:
+            try:
+                config = json.loads(cache_path.read_text())
+            except ValueError as e:
+                logger.warning(f"Ignoring unreadable config cache {cache_path}: {e}")
+                
+        if config is None:
+            with open(config_path, 'r') as f:
+                config = yaml.load(f, Loader=SafeLoader)
+            try:
+                cache_path.write_text(json.dumps(config))
+            except (OSError, TypeError) as e:
+                logger.warning(f"Could not write config cache {cache_path}: {e}")
             
         # Ensure required directories exist
-        Path(config['app']['screenshot_dir']).mkdir(parents=True, exist_ok=True)
-        Path(config['app']['known_faces_dir']).mkdir(parents=True, exist_ok=True)
-        Path(config['app']['log_dir']).mkdir(parents=True, exist_ok=True)
+        for key in ('screenshot_dir', 'known_faces_dir', 'log_dir'):
+            Path(config['app'][key]).mkdir(parents=True, exist_ok=True)
         
         return config
     except Exception as e:
@@ -73,6 +95,7 @@ def setup_logging(log_dir: str):
     Log Files:
         - app.log (INFO level, rotated every 10MB, kept for 7 days)
         - error.log (ERROR level, rotated every 10MB, kept for 30 days)
+        Both are written as JSON lines from a background thread.
 
     Usage:
         setup_logging(config['app']['log_dir'])
@@ -81,13 +104,21 @@ def setup_logging(log_dir: str):
         f"{log_dir}/app.log",
         rotation="10 MB",
         retention="7 days",
-        level="INFO"
+        level="INFO",
+        enqueue=True,
+        serialize=True,
+        backtrace=False,
+        diagnose=False
     )
     logger.add(
         f"{log_dir}/error.log",
         rotation="10 MB",
         retention="30 days",
-        level="ERROR"
+        level="ERROR",
+        enqueue=True,
+        serialize=True,
+        backtrace=False,
+        diagnose=False
     )
 
 
@@ -174,6 +205,7 @@ def main():
         def on_close():
             window.camera_manager.stop_all_cameras()
             window.alert_system.shutdown()
+            window.database.shutdown()
             app.quit()
             
         app.aboutToQuit.connect(on_close)
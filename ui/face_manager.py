@@ -1,14 +1,68 @@
 import os
-from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QListWidget, QPushButton,
+from collections import OrderedDict
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QPushButton,
                             QLabel, QFileDialog, QMessageBox, QLineEdit, QComboBox)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
 from PyQt5.QtGui import QPixmap
 from loguru import logger
 import cv2
 import numpy as np
 from pathlib import Path
 
-from core.utils import numpy_to_pixmap, resize_image
+from core.utils import load_scaled_pixmap, read_scaled_image, resize_image
+
+# Supported face image extensions
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Preview pixmaps keyed by (path, mtime, width, height), least recently used first;
+# mtime is part of the key so edited files reload
+PREVIEW_CACHE_SIZE = 64
+_preview_cache = OrderedDict()
+# The preview is rescaled once resizing has paused for this long
+PREVIEW_RESIZE_DELAY_MS = 150
+
+class _PreviewSignals(QObject):
+    # token, cache key, decoded QImage
+    loaded = pyqtSignal(int, object, object)
+    # token, error message
+    failed = pyqtSignal(int, str)
+
+class _PreviewLoader(QRunnable):
+    """Decodes a preview image on the thread pool and reports back through _PreviewSignals"""
+    def __init__(self, token: int, key: tuple, signals: _PreviewSignals):
+        super().__init__()
+        self.token = token
+        self.key = key
+        self.signals = signals
+
+    def run(self):
+        path, _, width, height = self.key
+        try:
+            # QImage is safe off the GUI thread; the QPixmap is made when the result arrives
+            self.signals.loaded.emit(self.token, self.key, read_scaled_image(path, width, height))
+        except Exception as e:
+            self.signals.failed.emit(self.token, str(e))
+
+class _SaveSignals(QObject):
+    # value returned by the save function
+    finished = pyqtSignal(object)
+    # error message
+    failed = pyqtSignal(str)
+
+class _SaveTask(QRunnable):
+    """Runs a face save (decode, encode, embed) on the thread pool and reports back through _SaveSignals"""
+    def __init__(self, fn, signals: _SaveSignals):
+        super().__init__()
+        self.fn = fn
+        self.signals = signals
+
+    def run(self):
+        try:
+            result = self.fn()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
 
 class FaceManagerDialog(QDialog):
     def __init__(self, face_detector, known_faces_dir):
@@ -22,7 +76,24 @@ class FaceManagerDialog(QDialog):
         super().__init__()
         self.face_detector = face_detector
         self.known_faces_dir = known_faces_dir
-        self.current_image = None
+        # Image file of the selected or imported face; decoded on the thread pool when it is saved
+        self._selected_path = None
+        # Incremented per selection so previews that finish decoding late are not shown
+        self._preview_token = 0
+        self._preview_signals = _PreviewSignals(self)
+        self._preview_signals.loaded.connect(self._on_preview_loaded)
+        self._preview_signals.failed.connect(self._on_preview_failed)
+        # Names in the face list, so add_face can check for duplicates without scanning the directory
+        self._face_names = set()
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(PREVIEW_RESIZE_DELAY_MS)
+        self._resize_timer.timeout.connect(self._on_preview_resized)
+        # Called with the save task's result; set only while a save is running
+        self._save_done = None
+        self._save_signals = _SaveSignals(self)
+        self._save_signals.finished.connect(self._on_save_finished)
+        self._save_signals.failed.connect(self._on_save_failed)
         
         self.setWindowTitle("Face Manager")
         self.setGeometry(200, 200, 800, 600)
@@ -88,6 +159,9 @@ class FaceManagerDialog(QDialog):
         self.close_btn.clicked.connect(self.close)
         button_layout.addWidget(self.close_btn)
         
+        self.status_label = QLabel()
+        button_layout.addWidget(self.status_label)
+        
         layout.addLayout(button_layout)
         
         self.setLayout(layout)
@@ -96,17 +170,32 @@ class FaceManagerDialog(QDialog):
         """
         Load and display all face images from the known faces directory into the list widget.
         Only image files with extensions .jpg, .jpeg, .png are considered.
+        Each item carries the image's Path as its UserRole data.
         """
         self.face_list.clear()
-        known_faces_dir = Path(self.known_faces_dir)
+        self._face_names.clear()
         
-        if not known_faces_dir.exists():
-            logger.warning(f"Known faces directory {known_faces_dir} does not exist")
+        try:
+            entries = os.scandir(self.known_faces_dir)
+        except FileNotFoundError:
+            logger.warning(f"Known faces directory {self.known_faces_dir} does not exist")
             return
             
-        for face_file in known_faces_dir.glob('*.*'):
-            if face_file.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                self.face_list.addItem(face_file.stem)
+        # Match on the entry name alone; no Path objects or stat calls for the rest
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                name, dot, ext = entry.name.rpartition('.')
+                if not name:
+                    continue
+                ext = dot + ext.lower()
+                if ext not in IMAGE_EXTENSIONS:
+                    continue
+                item = QListWidgetItem(name)
+                item.setData(Qt.UserRole, Path(entry.path))
+                self._face_names.add(name)
+                self.face_list.addItem(item)
                 
     def on_face_selected(self, current, previous):
         """
@@ -119,56 +208,132 @@ class FaceManagerDialog(QDialog):
             current: The currently selected QListWidgetItem.
             previous: The previously selected QListWidgetItem.
         """
+        self._preview_token += 1
         if current is None:
             self.face_preview.clear()
             self.name_input.clear()
+            self._selected_path = None
             return
             
         face_name = current.text()
         self.name_input.setText(face_name)
         
         # Load and display the face image
-        face_path = Path(self.known_faces_dir) / f"{face_name}{self.get_face_extension(face_name)}"
+        face_path = current.data(Qt.UserRole)
         if not face_path.exists():
             QMessageBox.warning(self, "Error", f"Image file not found: {face_path}")
             return
             
-        try:
-            image = cv2.imread(str(face_path))
-            if image is None:
-                raise ValueError("Could not read image")
-                
-            self.current_image = image
-            pixmap = numpy_to_pixmap(image)
-            self.face_preview.setPixmap(pixmap.scaled(
-                self.face_preview.width(), self.face_preview.height(),
-                Qt.KeepAspectRatio, Qt.SmoothTransformation))
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to load image: {str(e)}")
-            logger.error(f"Error loading face image: {e}")
+        self._selected_path = face_path
+        self.face_preview.clear()
+        self._show_preview(face_path)
+        
+    def _show_preview(self, face_path):
+        """Show face_path in the preview, from the cache or decoded on the thread pool"""
+        key = (str(face_path), face_path.stat().st_mtime,
+               self.face_preview.width(), self.face_preview.height())
+        pixmap = _preview_cache.get(key)
+        if pixmap is not None:
+            _preview_cache.move_to_end(key)
+            self.face_preview.setPixmap(pixmap)
+            return
+            
+        # Decode off the GUI thread so large images don't stall the dialog
+        QThreadPool.globalInstance().start(
+            _PreviewLoader(self._preview_token, key, self._preview_signals))
+            
+    def resizeEvent(self, event):
+        """Rescale the preview once the user stops resizing the dialog"""
+        super().resizeEvent(event)
+        self._resize_timer.start()
+        
+    def _on_preview_resized(self):
+        """Drop previews scaled for the old size and re-show the selected image at the new one"""
+        size = (self.face_preview.width(), self.face_preview.height())
+        for key in [key for key in _preview_cache if key[2:] != size]:
+            del _preview_cache[key]
+        if self._selected_path is None or not self._selected_path.exists():
+            return
+        self._preview_token += 1
+        self._show_preview(self._selected_path)
+        
+    def _on_preview_loaded(self, token, key, image):
+        """Cache a decoded preview and show it if its face is still the selected one"""
+        pixmap = QPixmap.fromImage(image)
+        _preview_cache[key] = pixmap
+        while len(_preview_cache) > PREVIEW_CACHE_SIZE:
+            _preview_cache.popitem(last=False)
+        if token == self._preview_token:
+            self.face_preview.setPixmap(pixmap)
+            
+    def _on_preview_failed(self, token, message):
+        """Report a preview that could not be decoded, unless the selection has moved on"""
+        logger.error(f"Error loading face image: {message}")
+        if token == self._preview_token:
+            QMessageBox.critical(self, "Error", f"Failed to load image: {message}")
             
-    def get_face_extension(self, face_name: str) -> str:
+    def _image_loader(self):
         """
-        Search for the file extension of a face image by checking common image formats.
-
-        Args:
-            face_name (str): The base filename (without extension) of the face.
+        Capture the path of the selected or imported image so it can be decoded on a worker thread.
 
         Returns:
-            str: The file extension including the dot (e.g., '.jpg'), or empty string if not found.
+            callable or None: Reads the BGR image (or None if unreadable) when called,
+            or None if no image is selected.
+        """
+        path = self._selected_path
+        if path is None:
+            return None
+        return lambda: cv2.imread(str(path))
+        
+    def _start_save(self, fn, on_done):
         """
-        known_faces_dir = Path(self.known_faces_dir)
-        for ext in ['.jpg', '.jpeg', '.png']:
-            if (known_faces_dir / f"{face_name}{ext}").exists():
-                return ext
-        return ''
+        Run fn on the thread pool with the editing buttons disabled.
+
+        Args:
+            fn: Callable doing the decode, encode and embed work.
+            on_done: Called on the GUI thread with fn's result.
+        """
+        self._save_done = on_done
+        self._set_saving(True)
+        QThreadPool.globalInstance().start(_SaveTask(fn, self._save_signals))
+        
+    def _set_saving(self, saving):
+        """Disable the editing buttons and show the saving indicator while a save runs."""
+        for button in (self.add_btn, self.update_btn, self.delete_btn, self.import_btn, self.close_btn):
+            button.setEnabled(not saving)
+        self.status_label.setText("Saving..." if saving else "")
         
+    def _on_save_finished(self, result):
+        """Re-enable editing and hand the save result to its callback."""
+        on_done, self._save_done = self._save_done, None
+        self._set_saving(False)
+        on_done(result)
+        
+    def _on_save_failed(self, message):
+        """Re-enable editing and report a save that raised."""
+        self._save_done = None
+        self._set_saving(False)
+        logger.error(f"Error saving face: {message}")
+        QMessageBox.critical(self, "Error", f"Failed to save face: {message}")
+        
+    def reject(self):
+        """Ignore Escape while a save is running, so its results have a dialog to return to."""
+        if self._save_done is None:
+            super().reject()
+            
+    def closeEvent(self, event):
+        """Keep the dialog open while a save is running."""
+        if self._save_done is not None:
+            event.ignore()
+            return
+        super().closeEvent(event)
+            
     def add_face(self):
         """
         Add a new face image to the known faces directory and update the face detector.
 
         Checks if a name is entered and an image is loaded, prevents overwriting existing faces.
+        The image is decoded, saved and embedded on the thread pool.
         Shows relevant messages for success or errors.
         """
         name = self.name_input.text().strip()
@@ -176,21 +341,31 @@ class FaceManagerDialog(QDialog):
             QMessageBox.warning(self, "Error", "Please enter a name for the face")
             return
             
-        if self.current_image is None:
+        load_image = self._image_loader()
+        if load_image is None:
             QMessageBox.warning(self, "Error", "Please import or select an image first")
             return
             
         # Check if face already exists
-        existing_files = list(Path(self.known_faces_dir).glob(f"{name}.*"))
-        if existing_files:
+        if name in self._face_names:
             QMessageBox.warning(self, "Error", f"A face with name '{name}' already exists")
             return
             
         # Add the face
-        success = self.face_detector.add_known_face(
-            self.current_image, name, self.known_faces_dir)
+        face_detector, known_faces_dir = self.face_detector, self.known_faces_dir
+        def save():
+            image = load_image()
+            if image is None:
+                return None
+            return face_detector.add_known_face(image, name, known_faces_dir)
             
-        if success:
+        self._start_save(save, lambda success: self._on_face_added(name, success))
+        
+    def _on_face_added(self, name, success):
+        """Report the result of add_face and refresh the list."""
+        if success is None:
+            QMessageBox.warning(self, "Error", "Could not read the image")
+        elif success:
             QMessageBox.information(self, "Success", f"Face '{name}' added successfully")
             self.load_face_list()
         else:
@@ -201,8 +376,9 @@ class FaceManagerDialog(QDialog):
         Update an existing face image and/or rename it.
 
         Validates that a face is selected, name input is filled, and image is loaded.
-        Renames the file if the name has changed and saves the new image.
-        Reloads known faces in the detector and refreshes the UI.
+        Renames the file if the name has changed and saves the image if a new one was imported.
+        Updates only this face in the detector and refreshes the UI.
+        A new image is decoded, saved and embedded on the thread pool.
         """
         current_item = self.face_list.currentItem()
         if current_item is None:
@@ -216,14 +392,18 @@ class FaceManagerDialog(QDialog):
             QMessageBox.warning(self, "Error", "Please enter a name for the face")
             return
             
-        if self.current_image is None:
+        # Only an imported image has to be written; the selected face's own file is already on disk
+        current_path = current_item.data(Qt.UserRole)
+        image_changed = self._selected_path != current_path
+        load_image = self._image_loader() if image_changed else None
+        if image_changed and load_image is None:
             QMessageBox.warning(self, "Error", "Please import or select an image first")
             return
             
         # Rename file if name changed
         if old_name != new_name:
-            old_path = Path(self.known_faces_dir) / f"{old_name}{self.get_face_extension(old_name)}"
-            new_path = Path(self.known_faces_dir) / f"{new_name}{old_path.suffix}"
+            old_path = current_path
+            new_path = old_path.with_name(f"{new_name}{old_path.suffix}")
             
             if new_path.exists():
                 QMessageBox.warning(self, "Error", f"A face with name '{new_name}' already exists")
@@ -234,26 +414,44 @@ class FaceManagerDialog(QDialog):
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to rename face: {str(e)}")
                 return
-                
-        # Update the face image if it's different
-        try:
-            current_path = Path(self.known_faces_dir) / f"{new_name}{self.get_face_extension(new_name)}"
-            cv2.imwrite(str(current_path), self.current_image)
+            self.face_detector.rename_known_face(old_path, new_path)
+            current_path = new_path
+            
+        if not image_changed:
+            self._on_face_updated(True)
+            return
             
-            # Reload the face in the detector
-            self.face_detector.load_known_faces(self.known_faces_dir)
+        # Write the new image and re-embed just this face in the detector
+        face_detector = self.face_detector
+        def save():
+            image = load_image()
+            if image is None:
+                return None
+            if not cv2.imwrite(str(current_path), image):
+                raise IOError(f"Could not write {current_path}")
+            return face_detector.replace_known_face(current_path, image)
             
+        self._start_save(save, self._on_face_updated)
+        
+    def _on_face_updated(self, success):
+        """Report the result of update_face and refresh the list."""
+        if success is None:
+            QMessageBox.warning(self, "Error", "Could not read the image")
+            return
+        _preview_cache.clear()
+        if success:
             QMessageBox.information(self, "Success", "Face updated successfully")
-            self.load_face_list()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to update face: {str(e)}")
+        else:
+            # The file was written (and possibly renamed), so the list still has to be refreshed
+            QMessageBox.warning(self, "Error", "Failed to update face: the new image could not be recognized")
+        self.load_face_list()
             
     def delete_face(self):
         """
         Delete the selected face image from the known faces directory.
 
         Asks for user confirmation before deleting.
-        Refreshes the face list and reloads the face detector on success.
+        Refreshes the face list and removes the face from the detector on success.
         """
         current_item = self.face_list.currentItem()
         if current_item is None:
@@ -271,12 +469,13 @@ class FaceManagerDialog(QDialog):
             return
             
         # Delete the face file
-        face_path = Path(self.known_faces_dir) / f"{name}{self.get_face_extension(name)}"
+        face_path = current_item.data(Qt.UserRole)
         try:
             face_path.unlink()
+            _preview_cache.clear()
             
-            # Reload the face list and detector
-            self.face_detector.load_known_faces(self.known_faces_dir)
+            # Drop just this face from the detector and reload the list
+            self.face_detector.remove_known_face(face_path)
             self.load_face_list()
             
             QMessageBox.information(self, "Success", "Face deleted successfully")
@@ -297,15 +496,11 @@ class FaceManagerDialog(QDialog):
             return
             
         try:
-            image = cv2.imread(file_path)
-            if image is None:
-                raise ValueError("Could not read image")
-                
-            self.current_image = image
-            pixmap = numpy_to_pixmap(image)
-            self.face_preview.setPixmap(pixmap.scaled(
-                self.face_preview.width(), self.face_preview.height(),
-                Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            self._preview_token += 1  # drop any face preview still decoding
+            self.face_preview.setPixmap(load_scaled_pixmap(
+                file_path, self.face_preview.width(), self.face_preview.height()))
+            # The full image is decoded when it is added or used for an update
+            self._selected_path = Path(file_path)
                 
             # Suggest a name based on the filename
             suggested_name = Path(file_path).stem
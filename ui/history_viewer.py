@@ -1,5 +1,7 @@
+import functools
+import os
 from pathlib import Path
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QPushButton,
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QPushButton,
                             QLabel, QDateEdit, QComboBox, QSpacerItem, QSizePolicy,
                             QSplitter, QFrame, QMessageBox, QDialog)
 from PyQt5.QtCore import Qt, QDate, QDateTime
@@ -9,9 +11,24 @@ import time
 from datetime import datetime, timedelta
 from typing import List, Optional
 import cv2
+import yaml
 
 from core.database import FaceDatabase, FaceLogEntry
-from core.utils import numpy_to_pixmap
+from core.utils import load_thumbnail
+
+CAMERA_CONFIG_PATH = 'config/camera_config.yaml'
+
+@functools.lru_cache(maxsize=1)
+def _load_camera_config(path: str, mtime: float) -> dict:
+    """Parse the camera config; mtime is part of the cache key so edits are picked up"""
+    with open(path, 'r') as f:
+        return yaml.safe_load(f)
+
+def _format_time(timestamp: float) -> str:
+    """Format a timestamp as local 'YYYY-MM-DD HH:MM:SS' straight from the struct_time fields"""
+    lt = time.localtime(timestamp)
+    return (f"{lt.tm_year:04d}-{lt.tm_mon:02d}-{lt.tm_mday:02d} "
+            f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}")
 
 class HistoryViewer(QWidget):
     def __init__(self, database, config):
@@ -20,6 +37,10 @@ class HistoryViewer(QWidget):
         self.database = database
         self.config = config
         self.current_entry = None
+        # (start_date, end_date) -> (start_timestamp, end_timestamp) for the last date range used
+        self._date_range = None
+        # Summary rows behind the list as currently shown
+        self._shown_rows = None
         
         self.setup_ui()
         self.load_camera_list()
@@ -118,9 +139,7 @@ class HistoryViewer(QWidget):
     def load_camera_list(self):
         """Load the list of available cameras from the configuration file into the camera filter dropdown."""
         try:
-            with open('config/camera_config.yaml', 'r') as f:
-                import yaml
-                config = yaml.safe_load(f)
+            config = _load_camera_config(CAMERA_CONFIG_PATH, os.path.getmtime(CAMERA_CONFIG_PATH))
                 
             for camera in config.get('cameras', []):
                 self.camera_combo.addItem(
@@ -148,14 +167,19 @@ class HistoryViewer(QWidget):
             start_date = self.start_date.date().toPyDate()
             end_date = self.end_date.date().toPyDate() + timedelta(days=1)  # Include entire end day
             
-            start_timestamp = datetime.combine(start_date, datetime.min.time()).timestamp()
-            end_timestamp = datetime.combine(end_date, datetime.min.time()).timestamp()
+            # Local midnights only need converting when the dates change
+            if self._date_range is None or self._date_range[0] != (start_date, end_date):
+                self._date_range = ((start_date, end_date), (
+                    datetime.combine(start_date, datetime.min.time()).timestamp(),
+                    datetime.combine(end_date, datetime.min.time()).timestamp()
+                ))
+            start_timestamp, end_timestamp = self._date_range[1]
             
             camera_id = self.camera_combo.currentData()
             face_name = self.face_combo.currentData()
             
-            # Get filtered history
-            entries = self.database.get_face_logs(
+            # Get filtered history; only the columns shown in the list, details are loaded on selection
+            rows = self.database.get_face_logs_summary(
                 limit=1000,
                 camera_id=camera_id,
                 face_name=face_name,
@@ -163,19 +187,36 @@ class HistoryViewer(QWidget):
                 end_time=end_timestamp
             )
             
-            # Populate list
-            self.history_list.clear()
-            for entry in entries:
+            # Same rows as shown already: keep the list, its scroll position and selection as they are
+            if rows == self._shown_rows:
+                return
+            
+            # Build all items first; the filter combos are loaded once in __init__ and not re-queried here
+            # The query returns timestamps as floats; one that localtime cannot convert only skips its row
+            items = []
+            for log_id, timestamp, face_name, camera_name in rows:
                 try:
-                    # Ensure timestamp is a float
-                    timestamp = float(entry.timestamp) if isinstance(entry.timestamp, bytes) else entry.timestamp
-                    time_str = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
-                    item_text = f"{time_str} - {entry.face_name} on {entry.camera_name}"
-                    self.history_list.addItem(item_text)
-                    self.history_list.item(self.history_list.count() - 1).setData(Qt.UserRole, entry)
-                except Exception as e:
-                    logger.error(f"Error processing history entry: {e}")
+                    time_str = _format_time(timestamp)
+                except (TypeError, ValueError, OverflowError, OSError) as e:
+                    logger.warning(f"Skipping history entry {log_id} with invalid timestamp {timestamp!r}: {e}")
                     continue
+                item = QListWidgetItem(f"{time_str} - {face_name} on {camera_name}")
+                item.setData(Qt.UserRole, log_id)
+                items.append(item)
+                    
+            # Clearing still notifies the details panel; the inserts are done without repaints or signals
+            history_list = self.history_list
+            history_list.clear()
+            history_list.setUpdatesEnabled(False)
+            history_list.blockSignals(True)
+            try:
+                for item in items:
+                    history_list.addItem(item)
+            finally:
+                history_list.blockSignals(False)
+                history_list.setUpdatesEnabled(True)
+            # Only once the list is complete, so a failed rebuild is retried on the next refresh
+            self._shown_rows = rows
                     
         except Exception as e:
             logger.error(f"Error refreshing history: {e}")
@@ -190,8 +231,8 @@ class HistoryViewer(QWidget):
                 self.view_screenshot_btn.setEnabled(False)
                 return
                 
-            entry = current.data(Qt.UserRole)
-            if not isinstance(entry, FaceLogEntry):
+            entry = self.database.get_face_log(current.data(Qt.UserRole))
+            if entry is None:
                 return
                 
             self.current_entry = entry
@@ -199,8 +240,8 @@ class HistoryViewer(QWidget):
             # Safely format the timestamp
             try:
                 timestamp = float(entry.timestamp)
-                time_str = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
-            except (TypeError, ValueError) as e:
+                time_str = _format_time(timestamp)
+            except (TypeError, ValueError, OverflowError, OSError) as e:
                 logger.warning(f"Invalid timestamp format: {entry.timestamp}")
                 time_str = "Unknown time"
             
@@ -245,11 +286,7 @@ class HistoryViewer(QWidget):
                 QMessageBox.warning(self, "File Missing", f"Screenshot file not found: {screenshot_path}")
                 return
                 
-            image = cv2.imread(str(screenshot_path))
-            if image is None:
-                raise ValueError("Could not read screenshot")
-                
-            pixmap = numpy_to_pixmap(image)
+            pixmap = load_thumbnail(screenshot_path, 800, 600)
             
             # Create a dialog to show the screenshot
             dialog = QDialog(self)
@@ -257,8 +294,7 @@ class HistoryViewer(QWidget):
             layout = QVBoxLayout()
             
             image_label = QLabel()
-            image_label.setPixmap(pixmap.scaled(
-                800, 600, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            image_label.setPixmap(pixmap)
             layout.addWidget(image_label)
             
             close_btn = QPushButton("Close")
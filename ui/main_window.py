@@ -1,9 +1,11 @@
+import math
 import sys
+import threading
 import time
 from PyQt5.QtWidgets import (QMainWindow, QApplication, QWidget, QVBoxLayout, QHBoxLayout,
                             QLabel, QPushButton, QTabWidget, QScrollArea, QGridLayout,
                             QMessageBox, QFileDialog, QComboBox, QSlider, QSpinBox)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QSize
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal, QSize
 from PyQt5.QtGui import QPixmap, QImage, QIcon
 from loguru import logger
 from typing import Dict, Optional, Tuple
@@ -11,15 +13,111 @@ import numpy as np
 import cv2
 from pathlib import Path
 
-from core.face_detection import FaceDetector
+from core.face_detection import GENDER_NAMES, FaceBatch, FaceDetector, FaceMatches
 from core.camera_manager import CameraManager
 from core.alert_system import AlertEvent, AlertSystem
 from core.database import FaceDatabase
-from core.utils import numpy_to_pixmap, resize_image, draw_face_info
+from core.utils import numpy_to_pixmap, resize_image, resize_preview, annotate_frame
 from .face_manager import FaceManagerDialog
 from .alert_panel import AlertPanel
 from .history_viewer import HistoryViewer
 
+# How long the frame processor waits for a new frame before checking whether it should stop
+FRAME_WAIT_TIMEOUT = 0.1  # seconds
+# How often the GUI refreshes the status display
+STATUS_INTERVAL_MS = 1000
+# The recognition threshold is applied once the slider has been still for this long
+THRESHOLD_APPLY_DELAY_MS = 150
+# Camera views are tiles of one mosaic image, laid out in this many columns
+MOSAIC_COLUMNS = 2
+TILE_MIN_SIZE = (400, 300)
+TILE_SPACING = 10
+
+class FrameProcessor(QThread):
+    """
+    Worker thread that fetches camera frames and runs face detection and recognition on them.
+    Finished frames are handed to the GUI thread, which only displays them.
+
+    Each camera has a single slot for its newest finished frame. A frame the GUI has not
+    taken yet is replaced, so a slow GUI drops old frames instead of queueing them,
+    and frame_ready is emitted only when an empty slot is filled.
+
+    While display_enabled is False (the live view is not shown) frames are still processed,
+    so alerts keep firing, but nothing is handed to the GUI.
+    """
+    frame_ready = pyqtSignal(int)
+    error = pyqtSignal(str)
+
+    def __init__(self, camera_manager, process_frames, processing_interval, parent=None):
+        """
+        Args:
+            camera_manager (CameraManager): Source of the latest camera frames.
+            process_frames (callable): Takes {cam_id: frame} and returns {cam_id: processed frame}.
+            processing_interval (float): Minimum seconds between processed frames per camera.
+            parent (QObject, optional): Owner of the thread.
+        """
+        super().__init__(parent)
+        self.camera_manager = camera_manager
+        self.process_frames = process_frames
+        self.processing_interval = processing_interval
+        self.display_enabled = True
+        # Track last processed time per camera to limit processing
+        self.last_processed: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._latest: Dict[int, np.ndarray] = {}
+
+    def take_frame(self, cam_id: int) -> Optional[np.ndarray]:
+        """Take the newest finished frame for a camera, or None if there is none. Called from the GUI thread."""
+        with self._lock:
+            return self._latest.pop(cam_id, None)
+
+    def _publish(self, cam_id: int, frame: np.ndarray) -> None:
+        """Store a finished frame, replacing any the GUI has not taken yet"""
+        with self._lock:
+            notify = cam_id not in self._latest
+            self._latest[cam_id] = frame
+        if notify:
+            self.frame_ready.emit(cam_id)
+
+    def run(self):
+        """Process frames until interruption is requested."""
+        while not self.isInterruptionRequested():
+            try:
+                # Frames are only referenced inside this call, so they are freed
+                # before the next wait instead of lingering for another pass
+                self._process_available()
+            except Exception as e:
+                logger.error(f"Error in frame processor: {e}")
+                self.error.emit(f"Error: {str(e)}")
+                self.msleep(100)
+
+    def _process_available(self):
+        """Process and publish the frames the cameras have captured since the last pass."""
+        frames = self.camera_manager.wait_for_frames(FRAME_WAIT_TIMEOUT)
+        
+        # Check which frames we should process
+        current_time = time.time()
+        due = {}
+        for cam_id, frame in frames.items():
+            last_time = self.last_processed.get(cam_id, 0)
+            if current_time - last_time < self.processing_interval:
+                # Just display the frame without processing
+                if self.display_enabled:
+                    self._publish(cam_id, frame)
+            else:
+                due[cam_id] = frame
+                
+        if not due:
+            return
+            
+        # Process the frames of all due cameras together (face detection and recognition)
+        for cam_id, processed_frame in self.process_frames(due).items():
+            if self.display_enabled:
+                self._publish(cam_id, processed_frame)
+            
+            # Update last processed time
+            self.last_processed[cam_id] = current_time
+
 class MainWindow(QMainWindow):
     def __init__(self, config):
         """
@@ -50,13 +148,21 @@ class MainWindow(QMainWindow):
         # Start camera threads
         self.camera_manager.start_all_cameras()
         
-        # Setup update timer
-        self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self.update)
-        self.update_timer.start(30)  # ~30 FPS
+        # cam_id -> (faces, (gallery version, threshold), recognition results) from the last processed frame
+        self._recognition_cache: Dict[int, Tuple[FaceBatch, tuple, FaceMatches]] = {}
         
-        # Track last processed time per camera to limit processing
-        self.last_processed: Dict[int, float] = {}
+        # Frames are fetched and processed on a worker thread; the GUI thread only displays them
+        self.frame_processor = FrameProcessor(
+            self.camera_manager, self.process_frames, self.processing_interval, self)
+        self.frame_processor.frame_ready.connect(self.show_latest_frame)
+        self.frame_processor.error.connect(self.status_label.setText)
+        self.frame_processor.start()
+        self.tab_widget.currentChanged.connect(self._on_tab_changed)
+        
+        # Frames arrive through frame_ready; the only timer left refreshes the status display
+        self.status_timer = QTimer(self)
+        self.status_timer.timeout.connect(self.update_status)
+        self.status_timer.start(STATUS_INTERVAL_MS)
         
     def init_ui(self):
         """
@@ -116,32 +222,39 @@ class MainWindow(QMainWindow):
         Set up the 'Monitor' tab which displays live camera feeds in a scrollable grid layout.
         """
 
-        monitor_tab = QWidget()
+        self.monitor_tab = monitor_tab = QWidget()
         self.tab_widget.addTab(monitor_tab, "Monitor")
         
         # Scroll area for camera feeds
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
         
-        # Container for camera feeds
-        self.camera_container = QWidget()
-        self.camera_grid = QGridLayout(self.camera_container)
-        self.camera_grid.setSpacing(10)
-        
-        scroll.setWidget(self.camera_container)
+        # All camera feeds are drawn as tiles into one mosaic image, shown by a single label,
+        # so each refresh uploads one pixmap however many cameras there are
+        self._tile_pos: Dict[int, Tuple[int, int]] = {
+            cam_id: divmod(i, MOSAIC_COLUMNS) for i, cam_id in enumerate(self.camera_manager.cameras)
+        }
+        self._mosaic_rows = max(1, math.ceil(len(self._tile_pos) / MOSAIC_COLUMNS))
+        self._mosaic_cols = max(1, min(MOSAIC_COLUMNS, len(self._tile_pos)))
+        self._mosaic_buf: Optional[np.ndarray] = None
+        self._tile_size = (0, 0)
+        # Size of the frame last drawn in each tile, to know when its letterbox needs clearing
+        self._tile_frame_shapes: Dict[int, Tuple[int, int]] = {}
+        # Per-camera scratch buffers that frames are scaled into before being copied to their tile
+        self._resize_bufs: Dict[int, np.ndarray] = {}
+        self._mosaic_dirty = False
+        
+        self.mosaic_label = QLabel()
+        self.mosaic_label.setAlignment(Qt.AlignCenter)
+        self.mosaic_label.setMinimumSize(
+            self._mosaic_cols * (TILE_MIN_SIZE[0] + TILE_SPACING) - TILE_SPACING,
+            self._mosaic_rows * (TILE_MIN_SIZE[1] + TILE_SPACING) - TILE_SPACING
+        )
+        scroll.setWidget(self.mosaic_label)
         
         # Layout for monitor tab
         layout = QVBoxLayout(monitor_tab)
         layout.addWidget(scroll)
-        
-        # Add camera labels
-        self.camera_labels = {}
-        for cam_id in self.camera_manager.cameras:
-            label = QLabel()
-            label.setAlignment(Qt.AlignCenter)
-            label.setMinimumSize(400, 300)
-            self.camera_labels[cam_id] = label
-            self.camera_grid.addWidget(label, (cam_id // 2), (cam_id % 2))
             
     def setup_controls_tab(self):
         """
@@ -189,6 +302,10 @@ class MainWindow(QMainWindow):
         self.threshold_slider.setRange(50, 100)  # 0.5 to 1.0 in 0.01 increments
         self.threshold_slider.setValue(int(self.config['recognition']['recognition_threshold'] * 100))
         self.threshold_slider.valueChanged.connect(self.update_threshold)
+        self._threshold_timer = QTimer(self)
+        self._threshold_timer.setSingleShot(True)
+        self._threshold_timer.setInterval(THRESHOLD_APPLY_DELAY_MS)
+        self._threshold_timer.timeout.connect(self._apply_threshold)
         threshold_layout.addWidget(self.threshold_slider)
         
         self.threshold_value = QLabel(f"{self.threshold_slider.value() / 100:.2f}")
@@ -236,13 +353,11 @@ class MainWindow(QMainWindow):
         
     def open_face_manager(self):
         """
-        Open the face manager dialog to allow adding or removing known faces,
-        and reloads known faces into the face detector after closing the dialog.
+        Open the face manager dialog to allow adding or removing known faces.
+        The dialog keeps the face detector's known faces up to date as it edits them.
         """
         dialog = FaceManagerDialog(self.face_detector, self.config['app']['known_faces_dir'])
         dialog.exec_()
-        # Refresh known faces after dialog closes
-        self.face_detector.load_known_faces(self.config['app']['known_faces_dir'])
         
     def open_alert_panel(self):
         """
@@ -280,14 +395,18 @@ class MainWindow(QMainWindow):
             
     def update_threshold(self, value):
         """
-        Update the face recognition threshold used by the face detector.
+        Show the new face recognition threshold. It is handed to the face detector once the
+        slider settles, so dragging does not invalidate cached recognition results on every step.
         
         Args:
             value (int): New threshold slider value (scaled to 0.0 - 1.0).
         """
-        threshold = value / 100
-        self.face_detector.recognition_threshold = threshold
-        self.threshold_value.setText(f"{threshold:.2f}")
+        self.threshold_value.setText(f"{value / 100:.2f}")
+        self._threshold_timer.start()
+        
+    def _apply_threshold(self):
+        """Apply the threshold slider's current value to the face detector."""
+        self.face_detector.recognition_threshold = self.threshold_slider.value() / 100
         
     def update_processing_interval(self, value):
         """
@@ -297,52 +416,34 @@ class MainWindow(QMainWindow):
             value (int): Interval in milliseconds.
         """
         self.processing_interval = value / 1000
+        self.frame_processor.processing_interval = self.processing_interval
         
-    def update(self):
+    def process_frames(self, frames: Dict[int, np.ndarray]) -> Dict[int, np.ndarray]:
         """
-        Main update loop called by the QTimer every ~30ms.
-        It fetches frames from cameras, processes them if the interval allows,
-        and displays them on the GUI. Also updates system status.
+        Process the current frames of several cameras, detecting faces in all of them together.
+        Called on the frame processor thread, so it must not touch any widgets.
+
+        Args:
+            frames (Dict[int, np.ndarray]): Frame to process per camera ID.
+
+        Returns:
+            Dict[int, np.ndarray]: The processed frame per camera ID.
         """
-        try:
-            # Update camera feeds
-            frames = self.camera_manager.get_all_frames()
-            
-            for cam_id, frame in frames.items():
-                if frame is None:
-                    continue
-                    
-                # Check if we should process this frame
-                current_time = time.time()
-                last_time = self.last_processed.get(cam_id, 0)
-                if current_time - last_time < self.processing_interval:
-                    # Just display the frame without processing
-                    self.display_frame(cam_id, frame)
-                    continue
-                    
-                # Process the frame (face detection and recognition)
-                processed_frame, alert_triggered = self.process_frame(cam_id, frame)
-                
-                # Display the processed frame
-                self.display_frame(cam_id, processed_frame)
-                
-                # Update last processed time
-                self.last_processed[cam_id] = current_time
-                
-            # Update status display
-            self.update_status()
-            
-        except Exception as e:
-            logger.error(f"Error in update loop: {e}")
-            self.status_label.setText(f"Error: {str(e)}")
-            
-    def process_frame(self, cam_id: int, frame: np.ndarray) -> Tuple[np.ndarray, bool]:
+        cam_ids = list(frames)
+        batches = self.face_detector.detect_faces_batch([frames[cam_id] for cam_id in cam_ids], cam_ids)
+        return {cam_id: self.process_frame(cam_id, frames[cam_id], faces)[0]
+                for cam_id, faces in zip(cam_ids, batches)}
+        
+    def process_frame(self, cam_id: int, frame: np.ndarray,
+                      faces: Optional[FaceBatch] = None) -> Tuple[np.ndarray, bool]:
         """
         Process a video frame for face detection and recognition.
+        Called on the frame processor thread, so it must not touch any widgets.
 
         Args:
             cam_id (int): ID of the camera providing the frame.
             frame (np.ndarray): The frame to process.
+            faces (FaceBatch, optional): Faces already detected in the frame.
 
         Returns:
             Tuple[np.ndarray, bool]: The processed frame and a boolean indicating if an alert was triggered.
@@ -350,73 +451,149 @@ class MainWindow(QMainWindow):
         alert_triggered = False
         try:
             # Detect faces
-            faces = self.face_detector.detect_faces(frame)
+            if faces is None:
+                faces = self.face_detector.detect_faces(frame, cam_id)
             if not faces:
                 return frame, False
                 
-            # Recognize faces
-            recognized_faces = self.face_detector.recognize_faces(faces)
+            # Recognize faces; a frame the detector saw as unchanged returns the same batch,
+            # whose matches stand as long as the gallery and threshold are the same
+            key = (self.face_detector.gallery_version, self.face_detector.recognition_threshold)
+            cached = self._recognition_cache.get(cam_id)
+            if cached is not None and cached[0] is faces and cached[1] == key:
+                matches = cached[2]
+            else:
+                matches = self.face_detector.match_faces(faces)
+                self._recognition_cache[cam_id] = (faces, key, matches)
             
-            # Draw face info and check for alerts
-            for face, known_face, confidence in recognized_faces:
-                camera_name = self.camera_manager.cameras[cam_id].name
-                
-                if known_face:
-                    # Known face detected
-                    frame = draw_face_info(
-                        frame, face.bbox,
-                        name=known_face.name,
-                        confidence=confidence,
-                        camera_name=camera_name,
-                        age=face.age,
-                        gender=face.gender,
-                        timestamp=time.time()
-                    )
-                    
-                    # Trigger alert
-                    alert_event = self.alert_system.trigger_alert(
-                        cam_id, camera_name,
-                        known_face.name, face, confidence,
-                        frame
-                    )
+            camera_name = self.camera_manager.cameras[cam_id].name
+            now = time.time()
+            
+            # Pull each field out of the batch once instead of building a Face per detection
+            known = np.flatnonzero(matches.known_mask).tolist()
+            unknown = np.flatnonzero(~matches.known_mask).tolist()
+            bboxes = faces.bboxes.tolist()
+            confidences = matches.confidences.tolist()
+            ages = faces.ages.tolist()
+            genders = faces.genders.tolist()
+            
+            # Collect face info so the whole frame is annotated with a single copy
+            face_infos = [dict(
+                face_bbox=bboxes[i],
+                name=matches.names[i],
+                confidence=confidences[i],
+                camera_name=camera_name,
+                age=ages[i] if ages[i] >= 0 else None,
+                gender=GENDER_NAMES[genders[i]],
+                timestamp=now
+            ) for i in known]
+            face_infos.extend(dict(
+                face_bbox=bboxes[i],
+                name="Unknown",
+                confidence=confidences[i],
+                camera_name=camera_name,
+                timestamp=now
+            ) for i in unknown)
+            frame = annotate_frame(frame, face_infos)
+            
+            # Check for alerts
+            for i in known:
+                # Trigger alert (None while the face is still in its cooldown)
+                alert_event = self.alert_system.trigger_alert(
+                    cam_id, camera_name,
+                    matches.names[i], faces[i], confidences[i],
+                    frame
+                )
+                if alert_event is not None:
                     alert_triggered = True
                     
                     # Log to database
                     self.database.log_face_event(alert_event)
-                else:
-                    # Unknown face
-                    frame = draw_face_info(
-                        frame, face.bbox,
-                        name="Unknown",
-                        confidence=confidence,
-                        camera_name=camera_name,
-                        timestamp=time.time()
-                    )
                     
         except Exception as e:
             logger.error(f"Error processing frame: {e}")
             
         return frame, alert_triggered
         
+    def _on_tab_changed(self, index: int):
+        """Only hand frames to the GUI while the Monitor tab is shown."""
+        self.frame_processor.display_enabled = self.tab_widget.widget(index) is self.monitor_tab
+        
+    def show_latest_frame(self, cam_id: int):
+        """
+        Display the newest frame the frame processor has finished for a camera.
+
+        Args:
+            cam_id (int): ID of the camera.
+        """
+        self.display_frame(cam_id, self.frame_processor.take_frame(cam_id))
+        
     def display_frame(self, cam_id: int, frame: np.ndarray):
         """
-        Display the processed frame in the corresponding camera view.
+        Draw the processed frame into its camera's tile of the mosaic.
+        Frames are skipped while the mosaic is out of sight; the mosaic itself is
+        uploaded once per batch of frames, see _refresh_mosaic.
 
         Args:
             cam_id (int): ID of the camera.
             frame (np.ndarray): Frame to display.
         """
         try:
-            if frame is None:
+            if frame is None or cam_id not in self._tile_pos:
                 return
                 
-            # Convert to QPixmap and display
-            pixmap = numpy_to_pixmap(frame)
-            self.camera_labels[cam_id].setPixmap(pixmap)
+            if self.mosaic_label.visibleRegion().isEmpty():
+                return
+                
+            buf = self._mosaic_buffer()
+            tile_w, tile_h = self._tile_size
+            row, col = self._tile_pos[cam_id]
+            x, y = col * (tile_w + TILE_SPACING), row * (tile_h + TILE_SPACING)
+            tile = buf[y:y + tile_h, x:x + tile_w]
+            
+            resized = resize_preview(frame, tile_w, tile_h, dst=self._resize_bufs.get(cam_id))
+            if resized is not frame:
+                self._resize_bufs[cam_id] = resized
+            frame = resized
+            if frame.ndim == 2:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            h, w = frame.shape[:2]
+            if self._tile_frame_shapes.get(cam_id) != (h, w):
+                tile.fill(0)
+                self._tile_frame_shapes[cam_id] = (h, w)
+            top, left = (tile_h - h) // 2, (tile_w - w) // 2
+            tile[top:top + h, left:left + w] = frame
+            
+            if not self._mosaic_dirty:
+                self._mosaic_dirty = True
+                QTimer.singleShot(0, self._refresh_mosaic)
             
         except Exception as e:
             logger.error(f"Error displaying frame: {e}")
             
+    def _mosaic_buffer(self) -> np.ndarray:
+        """Return the mosaic image, reallocating it when the label's size gives a new tile size."""
+        cols, rows = self._mosaic_cols, self._mosaic_rows
+        tile_size = (
+            max(TILE_MIN_SIZE[0], (self.mosaic_label.width() - (cols - 1) * TILE_SPACING) // cols),
+            max(TILE_MIN_SIZE[1], (self.mosaic_label.height() - (rows - 1) * TILE_SPACING) // rows)
+        )
+        if self._mosaic_buf is None or tile_size != self._tile_size:
+            self._tile_size = tile_size
+            self._mosaic_buf = np.zeros((
+                rows * (tile_size[1] + TILE_SPACING) - TILE_SPACING,
+                cols * (tile_size[0] + TILE_SPACING) - TILE_SPACING,
+                3
+            ), np.uint8)
+            self._tile_frame_shapes.clear()
+        return self._mosaic_buf
+        
+    def _refresh_mosaic(self):
+        """Upload the mosaic to its label once for all tiles drawn since the last refresh."""
+        self._mosaic_dirty = False
+        # Copied into the pixmap, since the buffer is drawn into again by the next frames
+        self.mosaic_label.setPixmap(numpy_to_pixmap(self._mosaic_buf))
+            
     def update_status(self):
         """
         Update the application's status display with:
@@ -425,15 +602,15 @@ class MainWindow(QMainWindow):
         - Recent alerts (last 3)
         """
         try:
-            status_text = []
+            cameras = self.camera_manager.cameras
+            active = self.camera_manager.active_cameras
             
             # Camera status
-            status_text.append("=== Camera Status ===")
-            for cam_id, cam_config in self.camera_manager.cameras.items():
-                running = cam_id in self.camera_manager.capture_threads
-                status_text.append(
-                    f"Camera {cam_id} ({cam_config.name}): {'Running' if running else 'Stopped'}"
-                )
+            status_text = ["=== Camera Status ==="]
+            status_text.extend(
+                f"Camera {cam_id} ({cam_config.name}): {'Running' if cam_id in active else 'Stopped'}"
+                for cam_id, cam_config in cameras.items()
+            )
                 
             # Face database status
             status_text.append("\n=== Face Database ===")
@@ -442,17 +619,19 @@ class MainWindow(QMainWindow):
             # Alert status
             status_text.append("\n=== Alerts ===")
             recent_alerts = self.alert_system.get_recent_alerts(3)
-            if recent_alerts:
-                for alert in recent_alerts:
-                    time_str = time.strftime("%H:%M:%S", time.localtime(alert.timestamp))
-                    status_text.append(
-                        f"{time_str}: {alert.face_name} on {alert.camera_name} "
-                        f"(Confidence: {alert.confidence:.2f})"
-                    )
-            else:
+            for alert in recent_alerts:
+                lt = time.localtime(alert.timestamp)
+                status_text.append(
+                    f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}: {alert.face_name} on {alert.camera_name} "
+                    f"(Confidence: {alert.confidence:.2f})"
+                )
+            if not recent_alerts:
                 status_text.append("No recent alerts")
                 
-            self.status_display.setText("\n".join(status_text))
+            # Skip the relayout when nothing changed since the last refresh
+            text = "\n".join(status_text)
+            if text != self.status_display.text():
+                self.status_display.setText(text)
             
         except Exception as e:
             logger.error(f"Error updating status: {e}")
@@ -462,16 +641,21 @@ class MainWindow(QMainWindow):
         Handle the application window close event.
 
         Performs cleanup:
+        - Stops the frame processor thread
         - Stops all camera threads
-        - Stops the UI update timer
+        - Stops the status timer
         - Saves configuration (if needed)
         """
         try:
+            # Stop the frame processor before the cameras it reads from
+            self.frame_processor.requestInterruption()
+            self.frame_processor.wait()
+            
             # Stop all cameras
             self.camera_manager.stop_all_cameras()
             
-            # Stop update timer
-            self.update_timer.stop()
+            # Stop status timer
+            self.status_timer.stop()
             
             # Save configuration
             # (Add configuration saving logic here if needed)